@@ -47,8 +47,9 @@ class BufferedQueue(collections.deque[T], interfaces.ConsumableQueue[T]):
         self._buff = collections.deque()
 
     def is_buffer_full(self) -> bool:
-        if self._size is not None:
-            return len(self) + len(self._buff) >= self._size
+        size = self._size
+        if size is not None:
+            return len(self) + len(self._buff) >= size
 
         return False
 
@@ -63,15 +64,31 @@ class BufferedQueue(collections.deque[T], interfaces.ConsumableQueue[T]):
             for _ in range(self._size - len(self)):
                 self.append(self._buff.popleft())
 
+    def drop_leading_nones(self) -> None:
+        """Remove the `None`s from the front of the queue and of the buffer."""
+        while self and self[0] is None:
+            self.popleft()
+        buff = self._buff
+        while buff and buff[0] is None:
+            buff.popleft()
+
     def chain(self):
         return itertools.chain(self, self._buff)
 
+    def reversed_chain(self):
+        """Same as `reversed(list(self.chain()))`, without the list."""
+        return itertools.chain(reversed(self._buff), reversed(self))
+
+    def buffered_len(self) -> int:
+        """The number of elements, including the buffered ones."""
+        return len(self) + len(self._buff)
+
     def pp_three_valued(self, vals: Sequence[str]) -> str:
         if self.is_buffer_full():
             # Full
             return vals[2]
 
-        if any(self.chain()):
+        if len(self) or len(self._buff):
             # Partial
             return vals[1]
 
@@ -97,14 +114,10 @@ class BufferedQueue(collections.deque[T], interfaces.ConsumableQueue[T]):
 
     # Implements interfaces.ConsumableQueue
     # The following is useless, but without it pylint will issue an error
-    # (E0110) for every instantiation of BufferedQueue.
-    # pylint: disable-next=useless-super-delegation
-    def __len__(self) -> int:
-        return super().__len__()
+    # (E0110) for every instantiation of BufferedQueue. Assigning deque's
+    # methods (instead of delegating to them with `super()`) keeps `len(q)`,
+    # `bool(q)` and `iter(q)` from going through a Python function call.
+    __len__ = collections.deque.__len__
 
     # Implements interfaces.ConsumableQueue
-    # The following is useless, but without it pylint will issue an error
-    # (E0110) for every instantiation of BufferedQueue.
-    # pylint: disable-next=useless-super-delegation
-    def __iter__(self):
-        return super().__iter__()
+    __iter__ = collections.deque.__iter__
@@ -17,8 +17,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+import pickle
 import sys
-from typing import Optional
+from typing import Iterable, Optional
 
 
 @dataclass(slots=True)
@@ -72,13 +73,15 @@ class Counter:
         # The assertion holds because the reset() functions assign 0 to all
         # keys.
         assert self.stalls.keys() == other.stalls.keys()
+        stalls = self.stalls
         for key, val in other.stalls.items():
-            self.stalls[key] += val
+            stalls[key] += val
 
         # The assertion holds because the reset() functions assign 0 to all
         # keys.
+        utilizations = self.utilizations
         for key, val in other.utilizations.items():
-            self.utilizations[key] += val
+            utilizations[key] += val
 
         self.scalar_load_store += other.scalar_load_store
         self.scalar_load_store_stall += other.scalar_load_store_stall
@@ -88,6 +91,32 @@ class Counter:
 
         return self
 
+    @staticmethod
+    def sum(counters: Iterable[Counter]) -> Counter:
+        """Accumulate `counters` into the first one, and return it.
+
+        `counters` is consumed one element at a time, so it can be a generator
+        that loads each counter only when it's needed.
+        """
+        it = iter(counters)
+        res = next(it)
+        for c in it:
+            res += c
+        return res
+
+    def save(self, path: str) -> None:
+        """Save the counter to the file `path` (see `load`)."""
+        with open(path, "wb") as out:
+            pickle.dump(self, out, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path: str) -> Counter:
+        """Load a counter that was saved with `save`."""
+        with open(path, "rb") as inp:
+            counter = pickle.load(inp)
+        assert isinstance(counter, Counter)
+        return counter
+
     def print(self, file=sys.stdout) -> None:
         print(f"*** cycles: {self.cycles}", file=file)
         if self.cycles == 0:
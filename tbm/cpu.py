@@ -14,10 +14,8 @@
 
 """CPU module."""
 
-import collections
 import itertools
 import logging
-import pickle
 import sys
 from typing import Any, Dict
 
@@ -43,6 +41,8 @@ class CPU:
         """Construct a CPU object."""
 
         self._print_header_cycle = None
+        # The headers of the three-valued trace (they don't change).
+        self._three_valued_headers = None
 
         # conunters
         self.counter = Counter()
@@ -79,55 +79,83 @@ class CPU:
 
         # For debugging! If self.counter.retired_instruction_count doesn't
         # change for deadlock_threshold cycles, we suspect TBM is in a
-        # deadlock, and terminate the execution.
+        # deadlock, and terminate the execution. To keep this off the per-cycle
+        # path, the count is sampled every deadlock_period cycles (a power of
+        # 2), and deadlock_threshold is a multiple of that (it used to be 100,
+        # checked every cycle). As the count can change anywhere between two
+        # samples, a deadlock is detected after deadlock_threshold to
+        # deadlock_threshold + deadlock_period - 1 cycles.
         prev_ret_insts = 0
         maybe_deadlock_count = 0
-        deadlock_threshold = 100
+        deadlock_period = 64
+        deadlock_threshold = 2 * deadlock_period
 
         for unit in self.units:
             unit.reset(self.counter)
 
+        # Bind the units' phase methods once, instead of looking them up on
+        # every cycle.
+        ticks = tuple(unit.tick for unit in self.units)
+        tocks = tuple(unit.tock for unit in self.units)
+
+        # The units are checked for pending instructions in instruction flow
+        # order, which is also the order of how likely they are to have any.
+        fetch_unit = self.fetch_unit
+        sched_unit = self.sched_unit
+        exec_unit = self.exec_unit
+        mem_sys = self.mem_sys
+
+        cntr = self.counter
+        print_cycles = tbm_options.args.print_cycles
+        print_trace = tbm_options.args.print_trace
+        # Logging is configured before the simulation starts.
+        log_enabled = logger.isEnabledFor(logging.INFO)
+
         with utilities.CallEvery(30,
                 lambda: logger.info("%s retired instructions",
                                     self.counter.retired_instruction_count)):
             # simulation's main loop
-            while (not self.fetch_unit.eof() or
-                   any(u.pending() for u in self.units)):
+            while (not fetch_unit.eof() or fetch_unit.pending() or
+                   sched_unit.pending() or exec_unit.pending() or
+                   mem_sys.pending()):
 
-                if (tbm_options.args.print_cycles is not None and
-                    self.counter.cycles >= tbm_options.args.print_cycles):
+                if print_cycles is not None and cntr.cycles >= print_cycles:
                     break
 
-                self.counter.cycles += 1
+                cntr.cycles += 1
 
-                self.log("start tick")
-                for unit in self.units:
-                    unit.tick(self.counter)
+                if log_enabled:
+                    self.log("start tick")
+                for tick in ticks:
+                    tick(cntr)
 
-                self.log("start tock")
-                for unit in self.units:
-                    unit.tock(self.counter)
+                if log_enabled:
+                    self.log("start tock")
+                for tock in tocks:
+                    tock(cntr)
+
+                if print_trace:
+                    self.print_state(print_trace)
 
-                if tbm_options.args.print_trace:
-                    self.print_state(tbm_options.args.print_trace)
+                if cntr.cycles & (deadlock_period - 1):
+                    continue
 
                 # Stop the simulation if we suspect a deadlock.
-                if prev_ret_insts == self.counter.retired_instruction_count:
-                    maybe_deadlock_count += 1
-                    if maybe_deadlock_count > deadlock_threshold:
+                if prev_ret_insts == cntr.retired_instruction_count:
+                    maybe_deadlock_count += deadlock_period
+                    if maybe_deadlock_count >= deadlock_threshold:
                         self.print_state_detailed(file=sys.stderr)
                         logger.error("(cycle %d) retired instruction count has"
-                                     " not changed for %d cycles, this is"
-                                     " probably a TBM bug.",
-                                     self.counter.cycles, deadlock_threshold)
+                                     " not changed for at least %d cycles,"
+                                     " this is probably a TBM bug.",
+                                     cntr.cycles, maybe_deadlock_count)
                         sys.exit(1)
                 else:
-                    prev_ret_insts = self.counter.retired_instruction_count
+                    prev_ret_insts = cntr.retired_instruction_count
                     maybe_deadlock_count = 0
 
         if tbm_options.args.save_counters:
-            with open(tbm_options.args.save_counters, "wb") as out:
-                pickle.dump(self.counter, out, pickle.HIGHEST_PROTOCOL)
+            self.counter.save(tbm_options.args.save_counters)
 
         if tbm_options.args.report:
             # Save report to file
@@ -170,7 +198,7 @@ class CPU:
 
         pp_vals = ["-", "P", "F"]
 
-        values = collections.deque([str(self.counter.cycles)])
+        values = [str(self.counter.cycles)]
         for unit in self.units:
             values.extend(unit.get_state_three_valued(pp_vals))
 
@@ -182,13 +210,16 @@ class CPU:
             self._print_header_cycle = self.counter.cycles % 100
 
         if self._print_header_cycle == self.counter.cycles % 100:
-            headers = collections.deque(["cycle"])
-            for unit in self.units:
-                headers.extend(unit.get_state_three_valued_header())
+            if self._three_valued_headers is None:
+                self._three_valued_headers = ["cycle"]
+                for unit in self.units:
+                    self._three_valued_headers.extend(
+                        unit.get_state_three_valued_header())
+            headers = self._three_valued_headers
 
             # Transpose the headers (i.e. print them vertically)
             height = max(len(h) for h in headers)
-            lines = [collections.deque() for _ in range(height)]
+            lines = [[] for _ in range(height)]
             for header, val in zip(headers, values):
                 # Because lines was constructed to match the longest header we
                 # know that in the zip_longest below it's the header that will
@@ -199,9 +230,10 @@ class CPU:
                                                      fillvalue=" "):
                     line.append(f"{c:{len(val)}}")
 
-            print(file=file)
+            out = [""]
             for line in reversed(lines):
-                print("|".join(line), file=file)
-            print("+".join("-" * len(val) for val in values), file=file)
+                out.append("|".join(line))
+            out.append("+".join("-" * len(val) for val in values))
+            file.write("\n".join(out) + "\n")
 
-        print("|".join(values), file=file)
+        file.write("|".join(values) + "\n")
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
 import re
 from typing import Optional, Sequence, Tuple
 
@@ -42,20 +43,31 @@ def asm_registers(
     Alterantively, use an external library to parse the instruction (machine
     code or disassembled).
     """
+    # The same instructions repeat many times in a trace, so the results are
+    # cached. Return copies, as the cached lists must not be modified.
+    inputs, outputs = _asm_registers(mnemonic, tuple(operands))
+    return (list(inputs), list(outputs))
+
+
+@functools.lru_cache(maxsize=65536)
+def _asm_registers(
+    mnemonic: str,
+    operands: Tuple[str, ...]) -> Tuple[Sequence[str], Sequence[str]]:
+    """Implements `asm_registers`, with hashable operands."""
 
     if (mnemonic in ["sb", "sh", "sw", "sbu", "shu", "fsw", "fsd"] or
             RE_RVV_STORE.match(mnemonic)):
         # store
         input_ops = operands
-        output_ops = []
+        output_ops = ()
     elif (mnemonic in ["j", "jr", "c.j"] or mnemonic.startswith("b")):
         # jump/branch
         input_ops = operands
-        output_ops = []
+        output_ops = ()
     elif (mnemonic in ["jal", "jalr"] and len(operands) == 1):
         # pseudo-instructions
         input_ops = operands
-        output_ops = ["x1"]
+        output_ops = ("x1",)
     else:
         # default behaviour: first operand is destination, remainder are outputs
         input_ops = operands[1:]
@@ -73,6 +85,7 @@ def asm_registers(
     return (normalize(inputs), normalize(outputs))
 
 
+@functools.lru_cache(maxsize=4096)
 def input_reg(operand: str) -> Optional[str]:
     """Extract a register from an input operand.
 
@@ -161,28 +174,42 @@ BOGUS_REGISTERS = {
     "mu",
 }
 
+# ABI_NAMES and BOGUS_REGISTERS merged into a single table: maps a register
+# name to its architectural name, or to None if it is not a register.
+_REG_MAP = {
+    **{b: None for b in BOGUS_REGISTERS},
+    **{r: (None if a in BOGUS_REGISTERS else a) for r, a in ABI_NAMES.items()},
+}
+
 
 def normalize(rs: Sequence[str]) -> Sequence[str]:
     """Replace ABI register names with their architectural names (removing x0).
 
-    Also, removes duplicates.
+    Also, removes duplicates (keeping the first occurrence).
 
     Args:
       rs: list of registers.
     Returns:
       list of registers
     """
-    return list({ABI_NAMES.get(r, r) for r in rs} - BOGUS_REGISTERS)
+    seen = set()
+    out = []
+    for r in rs:
+        a = _REG_MAP.get(r, r)
+        if a is not None and a not in seen:
+            seen.add(a)
+            out.append(a)
+    return out
 
 
-NOPS = {
+NOPS = frozenset({
     "nop",
     "c.nop",
     "fence",
     "fence.i",
     "sfence.vma",
     "wfi",
-}
+})
 
 
 def is_nop(mnemonic):
@@ -195,7 +222,7 @@ def is_nop(mnemonic):
 
 
 # List of all known branch instructions
-BRANCHES = {
+BRANCHES = frozenset({
     "beq",
     "bne",
     "blt",
@@ -220,7 +247,7 @@ BRANCHES = {
     "mret",
     "ecall",
     "ebreak",
-}
+})
 
 
 def is_branch(mnemonic: str) -> bool:
@@ -228,7 +255,7 @@ def is_branch(mnemonic: str) -> bool:
     return mnemonic in BRANCHES
 
 
-FLUSHES = {
+FLUSHES = frozenset({
     "csrr",
     "csrw",
     "csrs",
@@ -242,7 +269,7 @@ FLUSHES = {
     "fence",
     "fence.i",
     "sfence.vma",
-}
+})
 
 
 def is_flush(mnemonic: str) -> bool:
@@ -254,11 +281,11 @@ def is_flush(mnemonic: str) -> bool:
     return mnemonic in FLUSHES
 
 
-VCTRL = {
+VCTRL = frozenset({
     "vsetivli",
     "vsetvli",
     "vsetvl",
-}
+})
 
 
 def is_vctrl(mnemonic: str) -> bool:
@@ -266,6 +293,34 @@ def is_vctrl(mnemonic: str) -> bool:
     return mnemonic in VCTRL
 
 
+# Flags returned by `classify`.
+F_NOP = 1
+F_BRANCH = 2
+F_FLUSH = 4
+F_VCTRL = 8
+
+
+def _make_classes():
+    res = {}
+    for flag, mnemonics in ((F_NOP, NOPS), (F_BRANCH, BRANCHES),
+                            (F_FLUSH, FLUSHES), (F_VCTRL, VCTRL)):
+        for m in mnemonics:
+            res[m] = res.get(m, 0) | flag
+    return res
+
+
+# Map mnemonics to their `classify` flags.
+CLASSES = _make_classes()
+
+
+def classify(mnemonic: str) -> int:
+    """Return the flags of all of `is_nop`, `is_branch`, etc. in one lookup.
+
+    E.g. `is_branch(m)` is equivalent to `bool(classify(m) & F_BRANCH)`.
+    """
+    return CLASSES.get(mnemonic, 0)
+
+
 # List of control/status registers (incomplete)
 CSRS = {
     "cycle",
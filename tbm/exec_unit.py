@@ -12,9 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import collections
+import itertools
 import sys
-from typing import Any, Dict, Sequence, Union
+from typing import Any, Dict, Iterable, Sequence, Union
 
 from counter import Counter
 from instruction import Instruction
@@ -24,6 +24,10 @@ import scoreboard
 class ExecUnit(interfaces.ExecUnit):
     """Execution unit model."""
 
+    __slots__ = ("_branch_prediction", "_fetch_unit", "_sched_unit",
+                 "_sched_queues", "_pipe_map", "_rf_scoreboards", "_pipes",
+                 "_issue_queue_ids", "_flat_pipes")
+
     def __init__(
         self, config: Dict[str, Any], pipe_map: Dict[str, str],
         rf_scoreboards: Dict[str, Union[scoreboard.Preemptive,
@@ -35,19 +39,29 @@ class ExecUnit(interfaces.ExecUnit):
 
         self._fetch_unit = None
         self._sched_unit = None
+        self._sched_queues = ()
 
-        self._pipe_map = pipe_map
+        # Instruction mnemonics are interned when decoded (see
+        # `Instruction.from_fb`), so interning the keys here makes the lookups
+        # compare by identity.
+        self._pipe_map = {sys.intern(m): k for m, k in pipe_map.items()}
 
         # State
         self._rf_scoreboards = rf_scoreboards
         self._pipes = {}
-        self._retired_instructions = collections.deque()
+        # `self._issue_queue_ids[kind]` is the issue queue that feeds the
+        # `kind` pipes.
+        self._issue_queue_ids = {}
+        # All the pipes from `self._pipes`, flattened, in the same order.
+        self._flat_pipes = ()
 
     def add_pipe(self, kind: str,
                  pipes: Sequence[interfaces.ExecPipeline]) -> None:
         assert pipes
         assert kind not in self._pipes
         self._pipes[kind] = pipes
+        self._issue_queue_ids[kind] = pipes[0].issue_queue_id
+        self._flat_pipes += tuple(pipes)
 
     def connect(self, fetch_unit: interfaces.FetchUnit,
                 sched_unit: interfaces.SchedUnit) -> None:
@@ -56,29 +70,34 @@ class ExecUnit(interfaces.ExecUnit):
 
     # Implements interfaces.ExecUnit
     def pending(self) -> int:
-        return sum(p.pending() for ps in self._pipes.values() for p in ps)
+        return sum(p.pending() for p in self._flat_pipes)
 
     # Implements interfaces.ExecUnit
     def get_issue_queue_id(self, instr: Instruction) -> str:
-        kind = self.get_functional_unit(instr)
-        return self._pipes[kind][0].issue_queue_id
+        return self._issue_queue_ids[self.get_functional_unit(instr)]
 
     def get_functional_unit(self, instr: Instruction) -> str:
         """Return the functional unit kind the instruction will execute in."""
-        try:
-            return self._pipe_map[instr.mnemonic]
-        except KeyError:
-            self.logger.error("unknown pipe for instruction '%s'",
-                              instr.mnemonic)
-            sys.exit(1)
+        kind = instr.functional_unit_cache
+        if kind is None:
+            try:
+                kind = self._pipe_map[instr.mnemonic]
+            except KeyError:
+                self.logger.error("unknown pipe for instruction '%s'",
+                                  instr.mnemonic)
+                sys.exit(1)
+            instr.functional_unit_cache = kind
+        return kind
 
     # Implements interfaces.ExecUnit
     def reset(self, cntr: Counter) -> None:
         super().reset(cntr)
+        # The sched unit queues are all added by now (they are added after
+        # `connect`).
+        self._sched_queues = tuple(self._sched_unit.queues)
         # TODO(sflur): implement proper reset
-        for ps in self._pipes.values():
-            for p in ps:
-                p.reset(cntr)
+        for p in self._flat_pipes:
+            p.reset(cntr)
 
     # Implements interfaces.ExecUnit
     def tick(self, cntr: Counter) -> None:
@@ -90,50 +109,64 @@ class ExecUnit(interfaces.ExecUnit):
         """
         super().tick(cntr)
 
-        self._retired_instructions.clear()
-
         for sb in self._rf_scoreboards.values():
             sb.tick(cntr)
 
-        for ps in self._pipes.values():
-            for p in ps:
-                p.tick(cntr)
-                self._retired_instructions.extend(p.retired_instrs)
-
-        if self._branch_prediction == "none":
-            for instr in self._retired_instructions:
-                if instr.is_branch:
-                    self._sched_unit.branch_resolved()
-                    self._fetch_unit.branch_resolved()
-                    break
-
-        for dq in self._sched_unit.queues:
+        retired_count = 0
+        for p in self._flat_pipes:
+            p.tick(cntr)
+            retired_count += len(p.retired_instrs)
+
+        if self._branch_prediction == "none" and retired_count:
+            if any(instr.is_branch for instr in self.retired_instrs()):
+                self._sched_unit.branch_resolved()
+                self._fetch_unit.branch_resolved()
+
+        # Same as calling `dispatch_instruction` on the head of each queue, but
+        # inlined as this is the hot loop of the simulation.
+        pipes = self._pipes
+        # Pipes that rejected an instruction in this tick (see
+        # `interfaces.ExecPipeline.try_dispatch`).
+        full_pipes = set()
+        for dq in self._sched_queues:
             while dq:
-                if self.dispatch_instruction(dq[0], cntr):
-                    dq.popleft()
+                instr = dq[0]
+                # The functional unit was cached when the sched unit called
+                # `get_issue_queue_id`.
+                kind = (instr.functional_unit_cache or
+                        self.get_functional_unit(instr))
+                for pipe in pipes[kind]:
+                    if pipe in full_pipes:
+                        continue
+                    if pipe.try_dispatch(instr, cntr):
+                        dq.popleft()
+                        break
+                    full_pipes.add(pipe)
                 else:
                     break
 
         # Update retired instruction count.
-        cntr.retired_instruction_count += len(self._retired_instructions)
+        cntr.retired_instruction_count += retired_count
 
     # Implements interfaces.ExecUnit
     def tock(self, cntr: Counter) -> None:
         super().tock(cntr)
 
-
-        self._retired_instructions.clear()
-
         for sb in self._rf_scoreboards.values():
             sb.tock(cntr)
 
-        for ps in self._pipes.values():
-            for p in ps:
-                p.tock(cntr)
-                self._retired_instructions.extend(p.retired_instrs)
+        retired_count = 0
+        for p in self._flat_pipes:
+            p.tock(cntr)
+            retired_count += len(p.retired_instrs)
 
         # Update retired instruction count.
-        cntr.retired_instruction_count += len(self._retired_instructions)
+        cntr.retired_instruction_count += retired_count
+
+    def retired_instrs(self) -> Iterable[Instruction]:
+        """Instructions that retired in the current phase."""
+        return itertools.chain.from_iterable(p.retired_instrs
+                                             for p in self._flat_pipes)
 
     def dispatch_instruction(self, instr: Instruction, cntr: Counter):
         # TODO(sflur): use other policies to choose pipe, instead of the first
@@ -147,19 +180,18 @@ class ExecUnit(interfaces.ExecUnit):
 
     # Implements interfaces.ExecUnit
     def print_state_detailed(self, file) -> None:
-        for pipes in self._pipes.values():
-            for pipe in pipes:
-                pipe.print_state_detailed(file)
+        for pipe in self._flat_pipes:
+            pipe.print_state_detailed(file)
 
-        print("[re] " + ", ".join(str(i) for i in self._retired_instructions),
+        print("[re] " + ", ".join(str(i) for i in self.retired_instrs()),
               file=file)
 
     # Implements interfaces.ExecUnit
     def get_state_three_valued_header(self) -> Sequence[str]:
         return [pipe.get_state_three_valued_header()
-                for pipes in self._pipes.values() for pipe in pipes]
+                for pipe in self._flat_pipes]
 
     # Implements interfaces.ExecUnit
     def get_state_three_valued(self, vals: Sequence[str]) -> Sequence[str]:
         return [pipe.get_state_three_valued(vals)
-                for pipes in self._pipes.values() for pipe in pipes]
+                for pipe in self._flat_pipes]
@@ -14,7 +14,8 @@
 
 """Fetch Unit module."""
 
-from typing import Any, Dict, Optional, Sequence
+import logging
+from typing import Any, Dict, Sequence
 
 from buffered_queue import BufferedQueue
 import counter
@@ -22,38 +23,6 @@ from counter import Counter
 from functional_trace import FunctionalTrace
 import interfaces
 
-class NextFetch:
-    """Hold the sate of next-addr fetching.
-
-    `addr` is the memory location from which the next batch of instructions
-    should be fetched from. This can be None if there are no more instructions
-    in the trace, or when the next instruction (after a branch) is not the
-    normal +4 bytes successor.
-    """
-
-    def __init__(self) -> None:
-        self._addr = None
-        self._stall = False
-
-    @property
-    def addr(self) -> Optional[int]:
-        return self._addr
-
-    @addr.setter
-    def addr(self, val: int) -> None:
-        self._addr = val
-        self._stall = False
-
-    @property
-    def stall(self) -> bool:
-        return self._stall
-
-    @stall.setter
-    def stall(self, val: bool) -> None:
-        self._addr = None
-        self._stall = val
-
-
 class FetchUnit(interfaces.FetchUnit):
     def __init__(self, config: Dict[str, Any], trace: FunctionalTrace):
         super().__init__("FE")
@@ -62,18 +31,38 @@ class FetchUnit(interfaces.FetchUnit):
         self._branch_prediction = config["branch_prediction"]
         self._fetch_rate = config["fetch_rate"]
 
+        # TODO(sflur): make `inst_size` configurable.
+        self._inst_size = 4  # bytes
+        # The number of bytes in a fetch batch, and when that's a power of 2, a
+        # mask for aligning addresses to it.
+        self._batch_bytes = self._inst_size * self._fetch_rate
+        self._batch_mask = (~(self._batch_bytes - 1)
+                            if self._batch_bytes & (self._batch_bytes - 1) == 0
+                            else None)
 
         ## Current state
         # The queue from which `SchedUnit` reads.
         self._queue = BufferedQueue(config.get("fetch_queue_size"))
 
-        # The next address to fetch a batch from, or indicate a stall (waiting
-        # for branch target to be computed).
-        self._next_fetch_addr = NextFetch()
+        # The memory location from which the next batch of instructions should
+        # be fetched from. This can be None if there are no more instructions
+        # in the trace, or when the next instruction (after a branch) is not
+        # the normal +4 bytes successor.
+        self._next_fetch_addr = None
+        # Whether fetching is stalled, waiting for a branch target to be
+        # computed. Setting one of `self._next_fetch_addr` and
+        # `self._fetch_stall` resets the other.
+        self._fetch_stall = False
 
         ## Next state
         self._next_fetch_stall = None
 
+        # `cntr.utilizations[self.name]`, set by `reset`.
+        self._utilization = None
+
+        # Whether `self.log` messages are printed, set by `reset`.
+        self._log_enabled = False
+
     # Implements interfaces.FetchUnit
     @property
     def queue(self) -> interfaces.ConsumableQueue:
@@ -92,39 +81,46 @@ class FetchUnit(interfaces.FetchUnit):
         super().reset(cntr)
         # TODO(sflur): implement proper reset
         cntr.stalls[self.name] = 0
-        cntr.utilizations[self.name] = counter.Utilization(self.queue.size)
+        self._utilization = counter.Utilization(self.queue.size)
+        cntr.utilizations[self.name] = self._utilization
+        self._log_enabled = self.logger.isEnabledFor(logging.INFO)
 
     # Implements interfaces.FetchUnit
     def tick(self, cntr: Counter) -> None:
         super().tick(cntr)
 
-        if self._trace.eof():
+        trace = self._trace
+        queue = self._queue
+        fetch_rate = self._fetch_rate
+        next_fetch_addr = self._next_fetch_addr
+
+        if trace.eof():
             self.log("can't fetch new instructions:"
                      " no more instructions in trace.")
             return
 
-        if (self._queue.size is not None and
-                len(self._queue) + self._fetch_rate >
-                self._queue.size):
+        if (queue.size is not None and
+                len(queue) + fetch_rate > queue.size):
             self.log("can't fetch new instructions:"
                      " not enough room in the fetch queue.")
             cntr.stalls[self.name] += 1
             return
 
-        # TODO(sflur): make `inst_size` configurable.
-        inst_size = 4  # bytes
+        inst_size = self._inst_size
 
-        if self._next_fetch_addr.addr is not None:
-            if self._trace.next_addr() != self._next_fetch_addr.addr:
+        if next_fetch_addr is not None:
+            if trace.next_addr() != next_fetch_addr:
                 if self._branch_prediction == "none":
-                    self.log(
-                        "generating memory accesses for"
-                        f" {self._next_fetch_addr.addr} (but next trace"
-                        f" instruction is at {self._trace.next_addr()})")
+                    if self._log_enabled:
+                        self.log(
+                            "generating memory accesses for"
+                            f" {next_fetch_addr} (but next trace"
+                            f" instruction is at {trace.next_addr()})")
 
                     # TODO(sflur): generate memory accesses for the whole batch.
 
-                    self._next_fetch_addr.stall = True
+                    self._next_fetch_addr = None
+                    self._fetch_stall = True
                     return
 
                 assert self._branch_prediction == "perfect", (
@@ -132,7 +128,7 @@ class FetchUnit(interfaces.FetchUnit):
                         "Error: Unknown branch prediction option %s" %
                         self._branch_prediction)
 
-        elif self._next_fetch_addr.stall:
+        elif self._fetch_stall:
             self.log("stalling")
             cntr.stalls[self.name] += 1
             return
@@ -140,44 +136,60 @@ class FetchUnit(interfaces.FetchUnit):
         # The first address of the current batch. After a branch this might not
         # be properly aligned. We should still generate memory accesses for the
         # missing lower bytes!
-        fetch_addr = self._trace.next_addr()
+        fetch_addr = trace.next_addr()
         # TODO(sflur): generate memory accesses for the whole batch.
 
         # TODO(sflur): handle compressed instructions, and misaligned
         # instructions?
 
         # Set the address for the next batch, and force it to be aligned.
-        next_addr = fetch_addr + (inst_size * self._fetch_rate)
-        next_addr -= next_addr % (inst_size * self._fetch_rate)
-        self._next_fetch_addr.addr = next_addr
+        next_addr = fetch_addr + self._batch_bytes
+        if self._batch_mask is not None:
+            next_addr &= self._batch_mask
+        else:
+            next_addr -= next_addr % self._batch_bytes
+        self._next_fetch_addr = next_addr
+        self._fetch_stall = False
 
         # Buffer the current batch of instructions.
-        for fetch_addr in range(fetch_addr, next_addr, inst_size):
-            if fetch_addr != self._trace.next_addr():
+        fetch_addrs = range(fetch_addr, next_addr, inst_size)
+        batch = trace.dequeue_batch(fetch_addrs)
+        for i, inst in enumerate(batch):
+            if inst is None:
                 # This instruction was not executed in the functional trace,
                 # hence it's not in the trace. But, a uarch would fetch this
                 # instruction from memory, and it would occupy a place in the
                 # queue, so we simulate that (with a None).
-                self._queue.buffer(None)
+                queue.buffer(None)
                 continue
 
-            inst = self._trace.dequeue()
-            if inst is None:
-                self.log("no more instructions in trace")
-                break
+            if self._log_enabled:
+                self.log(inst.mnemonic + " from mem/trace")
+            queue.buffer(inst)
 
-            self.log(inst.mnemonic + " from mem/trace")
-            self._queue.buffer(inst)
+            if inst.is_branch:
+                continue
 
-            if (not inst.is_branch and
-                    inst.addr + inst_size != self._trace.next_addr()):
+            # The next entry in the batch, if any, is either the instruction at
+            # `inst.addr + inst_size` or None.
+            if i + 1 < len(batch) and batch[i + 1] is not None:
+                continue
+
+            # The address the trace was at right after `inst` was dequeued.
+            after_addr = next(
+                (f.addr for f in batch[i + 1:] if f is not None),
+                trace.next_addr())
+            if inst.addr + inst_size != after_addr:
                 # This could happen when an exception is taken
                 # TODO(sflur): what do we need to do to handle an exception?
                 self.log("next fetch is an exception handler?")
-                self._next_fetch_addr.addr = self._trace.next_addr()
+                self._next_fetch_addr = after_addr
+
+        if len(batch) < len(fetch_addrs):
+            self.log("no more instructions in trace")
 
         # We count all the instructions a uarch would actually fetch.
-        cntr.utilizations[self.name].count += self._fetch_rate
+        self._utilization.count += fetch_rate
 
     # Implements interfaces.FetchUnit
     def tock(self, cntr: Counter) -> None:
@@ -186,10 +198,11 @@ class FetchUnit(interfaces.FetchUnit):
         self._queue.flush()
 
         if self._next_fetch_stall is not None:
-            self._next_fetch_addr.stall = self._next_fetch_stall
+            self._next_fetch_addr = None
+            self._fetch_stall = self._next_fetch_stall
             self._next_fetch_stall = None
 
-        cntr.utilizations[self.name].occupied += len(self._queue)
+        self._utilization.occupied += len(self._queue)
 
     # Implements interfaces.FetchUnit
     def branch_resolved(self) -> None:
@@ -200,16 +213,14 @@ class FetchUnit(interfaces.FetchUnit):
 
         # The branch target might have already been placed in the the fetch
         # queue, so we only clean Nones (fake instructions) from the queue.
-        while self._queue.buff and self._queue.buff[0] is None:
-            self._queue.buff.popleft()
-        while self._queue and self._queue[0] is None:
-            self._queue.popleft()
+        self._queue.drop_leading_nones()
 
         if self.phase == interfaces.CyclePhase.TICK:
             self._next_fetch_stall = False
         else:
             assert self.phase == interfaces.CyclePhase.TOCK
-            self._next_fetch_addr.stall = False
+            self._next_fetch_addr = None
+            self._fetch_stall = False
 
     # Implements interfaces.FetchUnit
     def print_state_detailed(self, file) -> None:
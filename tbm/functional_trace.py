@@ -14,7 +14,7 @@
 
 """Trace module."""
 
-from typing import Any, IO, Optional
+from typing import Any, IO, List, Optional, Tuple
 
 # Generated by `flatc`.
 import FBInstruction.Instructions as FBInstrs
@@ -26,7 +26,7 @@ class FunctionalTrace:
     """Class representing a functional simulator trace."""
 
     def __init__(self, input_file: IO[Any], input_format: FileFormat,
-                 instructions_range: str) -> None:
+                 instructions_range: Tuple[int, Optional[int]]) -> None:
         self.input_file = input_file
 
         self.input_format = input_format
@@ -36,20 +36,21 @@ class FunctionalTrace:
             assert input_format == FileFormat.FLATBUFFERS
             self.read_instructions = self.read_fb_instructions
 
-        start, _, end = instructions_range.partition(":")
-        self.end = int(end) if end else None
+        start, self.end = instructions_range
 
         self.instr_count = 0
         self.instrs = []
         self.read_instructions()
-        self.skip(int(start))
+        self.skip(start)
 
     @classmethod
-    def from_json(cls, input_file: IO[Any], instructions_range: str):
+    def from_json(cls, input_file: IO[Any],
+                  instructions_range: Tuple[int, Optional[int]]):
         return cls(input_file, FileFormat.JSON, instructions_range)
 
     @classmethod
-    def from_fb(cls, input_file: IO[Any], instructions_range: str):
+    def from_fb(cls, input_file: IO[Any],
+                instructions_range: Tuple[int, Optional[int]]):
         return cls(input_file, FileFormat.FLATBUFFERS, instructions_range)
 
     def next_addr(self) -> Optional[int]:
@@ -66,6 +67,32 @@ class FunctionalTrace:
 
         return return_val
 
+    def dequeue_batch(self, addrs: range) -> List[Optional[Instruction]]:
+        """Dequeue the instructions at the addresses `addrs`, in order.
+
+        Equivalent to calling `dequeue` for each address that matches
+        `next_addr`. Addresses that don't match get a None entry (the
+        instruction was not executed). The returned list is shorter than
+        `addrs` if the end of the trace was reached.
+        """
+        batch = []
+        instrs = self.instrs
+        for addr in addrs:
+            if not instrs or instrs[-1].addr != addr:
+                batch.append(None)
+                continue
+
+            if self.end is not None and self.instr_count >= self.end:
+                break
+
+            batch.append(instrs.pop())
+            if not instrs:
+                self.read_instructions()
+                instrs = self.instrs
+            self.instr_count += 1
+
+        return batch
+
     def skip(self, n: int) -> None:
         if self.eof() or n <= 0:
             return
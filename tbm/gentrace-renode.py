@@ -25,7 +25,7 @@ import flatbuffers
 import FBInstruction.Instructions as FBInstrs
 
 import disassembler
-from instruction import Instruction, is_vector_register
+from instruction import Instruction, is_vector_register, reg_name
 import utilities
 from utilities import CallEvery
 from utilities import FileFormat
@@ -461,6 +461,7 @@ class ElaborateTrace:
 
         ops = operands.split(", ") if operands != "" else []
         (inputs, outputs) = disassembler.asm_registers(mnemonic, ops)
+        flags = disassembler.classify(mnemonic)
 
         new_instr = Instruction(addr=addr_int,
                                 opcode=opcode_int,
@@ -468,11 +469,11 @@ class ElaborateTrace:
                                 operands=ops,
                                 inputs=inputs,
                                 outputs=outputs,
-                                is_nop=disassembler.is_nop(mnemonic),
-                                is_branch=disassembler.is_branch(mnemonic),
+                                is_nop=bool(flags & disassembler.F_NOP),
+                                is_branch=bool(flags & disassembler.F_BRANCH),
                                 branch_target=None,
-                                is_flush=disassembler.is_flush(mnemonic),
-                                is_vctrl=disassembler.is_vctrl(mnemonic),
+                                is_flush=bool(flags & disassembler.F_FLUSH),
+                                is_vctrl=bool(flags & disassembler.F_VCTRL),
                                 loads=[],
                                 stores=[],
                                 lmul=None,
@@ -512,13 +513,13 @@ class ElaborateTrace:
             # Until Renode's format is enhanced, copy the current vector configuration to fields of vector register.
             for _, regs in self.curr_instr.inputs_by_type().items():
                 for reg in regs:
-                    if is_vector_register(reg):
+                    if is_vector_register(reg_name(reg)):
                         self.curr_instr.lmul, self.curr_instr.sew, self.curr_instr.vl = self._curr_vector_config
                         return True
 
             for _, regs in self.curr_instr.outputs_by_type().items():
                 for reg in regs:
-                    if is_vector_register(reg):
+                    if is_vector_register(reg_name(reg)):
                         self.curr_instr.lmul, self.curr_instr.sew, self.curr_instr.vl = self._curr_vector_config
                         return True
 
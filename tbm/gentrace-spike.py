@@ -159,17 +159,19 @@ class ElaborateTrace:
             mnemonic = m.group(4)
             ops = m.group(5).split(", ") if m.group(5) else []
             (inputs, outputs) = disassembler.asm_registers(mnemonic, ops)
+            flags = disassembler.classify(mnemonic)
             new_instr = Instruction(addr=addr,
                                     opcode=opcode,
                                     mnemonic=mnemonic,
                                     operands=ops,
                                     inputs=inputs,
                                     outputs=outputs,
-                                    is_nop=disassembler.is_nop(mnemonic),
-                                    is_branch=disassembler.is_branch(mnemonic),
+                                    is_nop=bool(flags & disassembler.F_NOP),
+                                    is_branch=bool(
+                                        flags & disassembler.F_BRANCH),
                                     branch_target=None,
-                                    is_flush=disassembler.is_flush(mnemonic),
-                                    is_vctrl=disassembler.is_vctrl(mnemonic),
+                                    is_flush=bool(flags & disassembler.F_FLUSH),
+                                    is_vctrl=bool(flags & disassembler.F_VCTRL),
                                     loads=[],
                                     stores=[],
                                     lmul=None,
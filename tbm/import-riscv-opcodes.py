@@ -84,10 +84,11 @@ def main(argv: Sequence[str]) -> int:
         "AUTO-GENERATED FILE, DO NOT ADD NEW KEYS (it's ok to change values)!"
     }
 
+    get_old = old_map.get
+
     with open(args.opcodes_file, "r", encoding="ascii") as opcodes_io:
         for line in opcodes_io:
-            line = line.partition("#")
-            tokens = line[0].split()
+            tokens = line.split("#", 1)[0].split()
 
             if not tokens:
                 continue
@@ -97,11 +98,11 @@ def main(argv: Sequence[str]) -> int:
             if pseudo:
                 name = name[1:]
 
-            if name in old_map:
-                new_map[name] = old_map[name]
-            else:
+            pipe = get_old(name)
+            if pipe is None:
                 logger.info("Adding a new opcode: '%s':  'UNKNOWN'.", name)
-                new_map[name] = "UNKNOWN"
+                pipe = "UNKNOWN"
+            new_map[name] = pipe
 
     with open(args.newmap, "w", encoding="ascii") as newmap_io:
         json.dump(new_map, newmap_io, indent=2)
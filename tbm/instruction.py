@@ -16,16 +16,18 @@
 
 from __future__ import annotations
 
-import collections
 import dataclasses
 from dataclasses import dataclass
 import json
 import re
-from typing import Any, Dict, List, Optional, Sequence, Union
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 
 # Generated by `flatc`.
 import FBInstruction.Instruction as FBInstr
 
+import utilities
+
 
 @dataclass(slots=True, kw_only=True)
 class Instruction:
@@ -53,8 +55,48 @@ class Instruction:
     sew: Optional[int]
     vl: Optional[int]
 
-    inputs_by_type_cache: Optional[Dict[str, Sequence[str]]] = None
-    outputs_by_type_cache: Optional[Dict[str, Sequence[str]]] = None
+    inputs_by_type_cache: Optional[Dict[str, Sequence[int]]] = None
+    outputs_by_type_cache: Optional[Dict[str, Sequence[int]]] = None
+
+    # The per-slice register accesses of a vector instruction, as computed by
+    # `VectorPipe.input_seq_by_type` and `VectorPipe.output_seq_by_type`.
+    input_seq_by_type_cache: Optional[
+        Dict[str, Sequence[Sequence[int]]]] = None
+    output_seq_by_type_cache: Optional[
+        Dict[str, Sequence[Sequence[int]]]] = None
+
+    # For each slice of a vector instruction, the `(rf, regs)` pairs it reads
+    # (writes), as computed by `VectorPipe.slice_reads` (`slice_writes`).
+    slice_reads_cache: Optional[
+        Sequence[Sequence[Tuple[str, Sequence[int]]]]] = None
+    slice_writes_cache: Optional[
+        Sequence[Sequence[Tuple[str, Sequence[int]]]]] = None
+
+    # For each slice of a vector instruction, the `(access, count)` of its
+    # loads (stores), as computed by `VectorPipe.load_slices`
+    # (`store_slices`).
+    load_slices_cache: Optional[Sequence[Tuple[int, int]]] = None
+    store_slices_cache: Optional[Sequence[Tuple[int, int]]] = None
+
+    # The number of slices the instruction executes in, as computed by
+    # `VectorPipe.eslices`.
+    eslices_cache: Optional[int] = None
+
+    # See `inputs_mask` and `outputs_mask`.
+    inputs_mask_cache: Optional[int] = None
+    outputs_mask_cache: Optional[int] = None
+
+    # The functional unit kind the instruction executes in, as resolved by
+    # `ExecUnit.get_functional_unit`.
+    functional_unit_cache: Optional[str] = None
+
+    # Bitmask of the scoreboards that currently track accesses of the
+    # instruction (see `scoreboard.Preemptive.bit`).
+    scoreboards_mask: int = 0
+
+    # Whether the instruction has been issued to a functional unit (see
+    # `scoreboard.Preemptive.issue`).
+    issued: bool = False
 
     def __eq__(self, other) -> bool:
         return id(self) == id(other)
@@ -63,23 +105,17 @@ class Instruction:
         return id(self)
 
     def to_json(self):
-        # For efficiency, and to match the FB:
-        inputs_by_type_cache = self.inputs_by_type_cache
-        self.inputs_by_type_cache = None
-        outputs_by_type_cache = self.outputs_by_type_cache
-        self.outputs_by_type_cache = None
-
-        res = json.dumps(dataclasses.asdict(self))
-
-        self.inputs_by_type_cache = inputs_by_type_cache
-        self.outputs_by_type_cache = outputs_by_type_cache
-
-        return res
+        # Only the trace fields, to match the FB. The caches and the
+        # simulation state are left out.
+        return json.dumps({name: getattr(self, name) for name in TRACE_FIELDS})
 
     @classmethod
     def from_json(cls, s: str) -> Instruction:
         """Parse JSON string to Instruction."""
-        d = json.loads(s)
+        d = utilities.json_loads(s)
+        # Mnemonics are used as dict keys (e.g. in the pipe map); interning
+        # makes those lookups compare by identity.
+        d["mnemonic"] = sys.intern(d["mnemonic"])
         return cls(**d)
 
     def fb_build(self, builder) -> Any:
@@ -166,7 +202,7 @@ class Instruction:
 
         return cls(addr=buf.Addr(),
                    opcode=buf.Opcode(),
-                   mnemonic=buf.Mnemonic().decode("utf-8"),
+                   mnemonic=sys.intern(buf.Mnemonic().decode("utf-8")),
                    operands=operands,
                    inputs=inputs,
                    outputs=outputs,
@@ -203,16 +239,30 @@ class Instruction:
 
         return 1
 
-    def inputs_by_type(self) -> Dict[str, Sequence[str]]:
+    def inputs_by_type(self) -> Dict[str, Sequence[int]]:
+        """Map register-files to the IDs (see `reg_id`) of input registers."""
         if self.inputs_by_type_cache is None:
             self.inputs_by_type_cache = sort_regs_by_type(self.inputs)
         return self.inputs_by_type_cache
 
-    def outputs_by_type(self) -> Dict[str, Sequence[str]]:
+    def outputs_by_type(self) -> Dict[str, Sequence[int]]:
+        """Map register-files to the IDs (see `reg_id`) of output registers."""
         if self.outputs_by_type_cache is None:
             self.outputs_by_type_cache = sort_regs_by_type(self.outputs)
         return self.outputs_by_type_cache
 
+    def inputs_mask(self) -> int:
+        """Bitmask of the input registers (see `regs_mask`)."""
+        if self.inputs_mask_cache is None:
+            self.inputs_mask_cache = regs_mask(self.inputs)
+        return self.inputs_mask_cache
+
+    def outputs_mask(self) -> int:
+        """Bitmask of the output registers (see `regs_mask`)."""
+        if self.outputs_mask_cache is None:
+            self.outputs_mask_cache = regs_mask(self.outputs)
+        return self.outputs_mask_cache
+
     def conflicts_with(self, other) -> bool:
         """Are there RAW/WAR/WAW conflicts between the instructions?
 
@@ -229,21 +279,69 @@ class Instruction:
           True if the instructions have conflicts, otherwise False.
         """
 
-        return (overlaps(self.inputs, other.outputs) or
-                overlaps(self.outputs, other.inputs) or
-                overlaps(self.outputs, other.outputs))
+        return conflicts_with_masks(self, other.inputs_mask(),
+                                    other.outputs_mask())
+
+
+def conflicts_with_masks(instr: Instruction, inputs_mask: int,
+                         outputs_mask: int) -> bool:
+    """Like `conflicts_with`, against the union of some instructions' masks.
+
+    Args:
+      instr: the instruction to check.
+      inputs_mask: the OR of the `inputs_mask` of the other instructions.
+      outputs_mask: the OR of the `outputs_mask` of the other instructions.
+
+    Returns:
+      True if `instr` conflicts with any of the other instructions.
+    """
+    return bool(instr.inputs_mask() & outputs_mask or
+                instr.outputs_mask() & (inputs_mask | outputs_mask))
+
 
+# The fields of `Instruction` that come from the trace, i.e. the ones without a
+# default value. The other fields are caches and simulation state.
+TRACE_FIELDS = tuple(f.name for f in dataclasses.fields(Instruction)
+                     if f.default is dataclasses.MISSING)
 
-def sort_regs_by_type(regs: Sequence[str]) -> Dict[str, Sequence[str]]:
+
+def sort_regs_by_type(regs: Sequence[str]) -> Dict[str, Sequence[int]]:
     res = {}
     for reg in regs:
         rf = register_type(reg)
-        res.setdefault(rf, collections.deque()).append(reg)
+        res.setdefault(rf, []).append(reg_id(reg))
     return res
 
 
-def overlaps(xs: Sequence[str], ys: Sequence[str]) -> bool:
-    return any(x in ys for x in xs)
+# Register names are interned to small ints, so that the (hot) scoreboard code
+# hashes and compares ints instead of strings. `REG_IDS[name]` is the ID of
+# the register `name`, and `REG_NAMES[id]` is the name of the register. IDs
+# start from 1, so, like the names they stand for, they are always truthy.
+REG_IDS: Dict[str, int] = {}
+REG_NAMES: List[Optional[str]] = [None]
+
+
+def reg_id(r: str) -> int:
+    """Return the ID of register `r`, allocating a new ID if needed."""
+    rid = REG_IDS.get(r)
+    if rid is None:
+        rid = len(REG_NAMES)
+        REG_IDS[r] = rid
+        REG_NAMES.append(r)
+    return rid
+
+
+def reg_name(rid: int) -> str:
+    """Return the name of the register with ID `rid`."""
+    return REG_NAMES[rid]
+
+
+def regs_mask(regs: Sequence[str]) -> int:
+    """The bitmask with the bits of the IDs (see `reg_id`) of `regs` set."""
+    mask = 0
+    for reg in regs:
+        mask |= 1 << reg_id(reg)
+    return mask
 
 
 RE_VREG = re.compile(r"v\d+$")
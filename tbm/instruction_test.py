@@ -0,0 +1,60 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for instruction."""
+
+import json
+import unittest
+
+from instruction import Instruction, TRACE_FIELDS
+
+# A JSON trace record in the format written before `to_json` was restricted
+# to `TRACE_FIELDS`, which also included the by-type caches.
+OLD_RECORD = (
+    '{"addr": 4332, "opcode": 19, "mnemonic": "vsetvli", "operands": ["x18",'
+    ' "x19", "e32", "m2", "ta", "ma"], "inputs": ["x19"], "outputs": ["vl",'
+    ' "vtype", "x18"], "is_nop": false, "is_branch": false, "branch_target":'
+    ' null, "is_flush": false, "is_vctrl": true, "loads": [], "stores": [],'
+    ' "lmul": 2, "sew": 32, "vl": 16, "inputs_by_type_cache": null,'
+    ' "outputs_by_type_cache": null}')
+
+
+class InstructionJsonTest(unittest.TestCase):
+    """JSON trace format of Instruction."""
+
+    def test_from_old_record(self):
+        instr = Instruction.from_json(OLD_RECORD)
+        self.assertEqual(instr.mnemonic, "vsetvli")
+        self.assertEqual(instr.outputs, ["vl", "vtype", "x18"])
+        self.assertEqual(instr.lmul, 2)
+
+    def test_to_json_has_trace_fields(self):
+        instr = Instruction.from_json(OLD_RECORD)
+        # Fill some of the caches.
+        instr.inputs_by_type()
+        instr.outputs_mask()
+        record = json.loads(instr.to_json())
+        self.assertEqual(tuple(record), TRACE_FIELDS)
+
+    def test_round_trip(self):
+        old = json.loads(OLD_RECORD)
+        del old["inputs_by_type_cache"]
+        del old["outputs_by_type_cache"]
+        record = Instruction.from_json(OLD_RECORD).to_json()
+        self.assertEqual(json.loads(record), old)
+        self.assertEqual(Instruction.from_json(record).to_json(), record)
+
+
+if __name__ == "__main__":
+    unittest.main()
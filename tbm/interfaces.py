@@ -14,7 +14,6 @@
 
 import abc
 import enum
-import collections
 import logging
 from typing import Generic, Iterable, Optional, Sequence, TypeVar
 
@@ -61,6 +60,9 @@ class ConsumableQueue(Generic[T], Iterable[T]):
 
 
 class Module(abc.ABC):
+    # Subclasses that don't define `__slots__` get a `__dict__` as usual.
+    __slots__ = ("_name", "_cycle", "_phase", "logger")
+
     def __init__(self, name: str):
         self._name = name
         self._cycle = None
@@ -82,6 +84,15 @@ class Module(abc.ABC):
         return self._phase
 
     def log(self, message: str) -> None:
+        """Log `message` at INFO level.
+
+        `message` is built before the call, so hot code that formats it should
+        first check `self.logger.isEnabledFor(logging.INFO)`.
+        """
+        # Logging is usually disabled; skip the checks below in that case.
+        if not self.logger.isEnabledFor(logging.INFO):
+            return
+
         if self._cycle is None:
             self.logger.info("[%s:init] %s", self.name, message)
         elif tbm_options.args.print_from_cycle <= self.cycle:
@@ -125,6 +136,8 @@ class Module(abc.ABC):
         pass
 
 class FetchUnit(Module):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def queue(self) -> ConsumableQueue[Instruction]:
@@ -140,6 +153,8 @@ class FetchUnit(Module):
 
 
 class SchedUnit(Module):
+    __slots__ = ()
+
     @property
     @abc.abstractmethod
     def queues(self) -> Iterable[ConsumableQueue[Instruction]]:
@@ -150,12 +165,16 @@ class SchedUnit(Module):
         pass
 
 class ExecUnit(Module):
+    __slots__ = ()
+
     @abc.abstractmethod
     def get_issue_queue_id(self, instr: Instruction) -> str:
         pass
 
 
 class ExecPipeline(Module):
+    __slots__ = ("_kind", "_issue_queue_id", "_depth", "_retired_instrs")
+
     def __init__(self, name: str, kind: str, issue_queue_id: str,
                  depth: int) -> None:
         super().__init__(name)
@@ -165,7 +184,7 @@ class ExecPipeline(Module):
         self._depth = depth
 
         # Instructions that were retired in the current cycle.
-        self._retired_instrs = collections.deque()
+        self._retired_instrs = []
 
     @property
     def kind(self) -> str:
@@ -187,39 +206,48 @@ class ExecPipeline(Module):
 
     @abc.abstractmethod
     def try_dispatch(self, instr: Instruction, cntr: Counter) -> bool:
-        pass
+        """Try to dispatch `instr` to the pipe.
+
+        Once this returns False, it must keep returning False (for any
+        instruction) until the end of the current tick.
+        """
 
 
 class Scoreboard(Module):
+    __slots__ = ()
+
     def insert_accesses(self, instr: Instruction, *,
                         # keyword-only args:
-                        reg_reads: Sequence[str],
-                        reg_writes: Sequence[str]) -> None:
-        """Record the reg accesses instr intends to execute."""
+                        reg_reads: Iterable[int],
+                        reg_writes: Iterable[int]) -> None:
+        """Record the reg accesses instr intends to execute.
+
+        Registers are identified by ints (see `instruction.reg_id`).
+        """
 
-    def can_read(self, instr: Instruction, regs: Sequence[str]) -> bool:
+    def can_read(self, instr: Instruction, regs: Sequence[int]) -> bool:
         """True iff instr can execute the reg reads in the next cycle.
 
         regs must be a subset of reg_reads of a previously call to
         insert_accesses.
         """
 
-    def read(self, instr: Instruction, regs: Sequence[str]) -> None:
+    def read(self, instr: Instruction, regs: Sequence[int]) -> None:
         """Record that instr is executing the reg reads in the next cycle."""
 
-    def can_write(self, instr: Instruction, regs: Sequence[str]) -> bool:
+    def can_write(self, instr: Instruction, regs: Sequence[int]) -> bool:
         """True iff instr can execute the reg writes in the next cycle.
 
         regs must be a subset of reg_writes of a previously call to
         insert_accesses.
         """
 
-    def buff_write(self, instr: Instruction, regs: Sequence[str]) -> None:
+    def buff_write(self, instr: Instruction, regs: Sequence[int]) -> None:
         """Record that the reg writes become avilable in the writeback queue in
         the next cycle.
         """
 
-    def write(self, instr: Instruction, regs: Sequence[str]) -> None:
+    def write(self, instr: Instruction, regs: Sequence[int]) -> None:
         """Record that the writes become avilable in the reg-file in the
         next cycle.
         """
@@ -14,8 +14,8 @@
 
 """MemorySystem module."""
 
+import array
 import collections
-import math
 import re
 import sys
 from typing import Optional, Sequence, Union
@@ -23,119 +23,134 @@ from typing import Optional, Sequence, Union
 from counter import Counter
 import interfaces
 
+
+def int_log2(x: int) -> int:
+    """Return floor(log2(x)), computed exactly (no floating point)."""
+    assert x > 0
+    return x.bit_length() - 1
+
+
 class LRUSet:
     """LRU set."""
 
+    __slots__ = ("the_set", "size")
+
     def __init__(self, size: int) -> None:
-        self.the_set = collections.deque(maxlen=size)
-        self.dirty = set()
+        # Maps the tags, ordered from least to most recently used, to their
+        # dirty bit.
+        self.the_set = collections.OrderedDict()
+        self.size = size
 
     def try_access(self, tag: int, set_dirty: bool) -> bool:
-        try:
-            self.the_set.remove(tag)
-            self.the_set.append(tag)
-            if set_dirty:
-                self.dirty.add(tag)
-            return True
-        except ValueError:  # remove failed, hence tag not in set
+        if tag not in self.the_set:
             return False
 
+        self.the_set.move_to_end(tag)
+        if set_dirty:
+            self.the_set[tag] = True
+        return True
+
     def evict(self) -> Optional[int]:
-        if len(self.the_set) == self.the_set.maxlen:
-            tag = self.the_set.popleft()
-            try:
-                self.dirty.remove(tag)
+        if len(self.the_set) == self.size:
+            tag, dirty = self.the_set.popitem(last=False)
+            if dirty:
                 return tag
-            except KeyError:
-                pass
         return None
 
     def insert(self, tag: int, dirty: bool) -> None:
         if self.the_set:
-            self.dirty.discard(self.the_set[0])
-        self.the_set.append(tag)
-        if dirty:
-            self.dirty.add(tag)
+            lru_tag = next(iter(self.the_set))
+            if len(self.the_set) == self.size:
+                del self.the_set[lru_tag]
+            elif self.the_set[lru_tag]:
+                self.the_set[lru_tag] = False
+        self.the_set[tag] = dirty
+        self.the_set.move_to_end(tag)
 
     def take(self, tag: int) -> bool:
-        if self.the_set[-1] == tag:
-            # This is an optimisation (take is always called after try_access)
-            self.the_set.pop()
-        else:
-            self.the_set.remove(tag)
-        try:
-            self.dirty.remove(tag)
-            return True
-        except KeyError:
-            return False
+        return self.the_set.pop(tag)
+
+
+# Marks an empty line in DirectMapMem.tags.
+_NO_TAG = -1
 
 
 class DirectMapMem:
     """Direct Map."""
 
+    __slots__ = ("line_size_log2", "index_size_log2", "tags", "dirty",
+                 "index_mask", "tag_shift")
+
     def __init__(self, line_size_log2: int,
                  size_log2: int) -> None:
 
         self.line_size_log2 = line_size_log2
         self.index_size_log2 = size_log2 - self.line_size_log2
-        self.tags = [None] * (2**self.index_size_log2)
-        self.dirty = set()
+        # Used by index() and tag(), which are inlined in the methods below.
+        self.index_mask = (1 << self.index_size_log2) - 1
+        self.tag_shift = self.line_size_log2 + self.index_size_log2
+
+        # The tag of each line, by index, or _NO_TAG for an empty line. As
+        # addresses are 64 bits, and tag_shift is positive, tags fit in a
+        # signed 64-bit array.
+        assert self.tag_shift > 0
+        self.tags = array.array("q", [_NO_TAG]) * (2**self.index_size_log2)
+        # The dirty bit of each line, by index.
+        self.dirty = bytearray(2**self.index_size_log2)
 
     def index(self, addr: int) -> int:
-        mask = (1 << self.index_size_log2) - 1
-        return (addr >> self.line_size_log2) & mask
+        return (addr >> self.line_size_log2) & self.index_mask
 
     def tag(self, addr: int) -> int:
-        return addr >> (self.line_size_log2 + self.index_size_log2)
+        return addr >> self.tag_shift
 
     def line_addr(self, addr: int) -> int:
         return (addr >> self.line_size_log2) << self.line_size_log2
 
     def try_access(self, addr: int, set_dirty: bool) -> bool:
-        if self.tags[self.index(addr)] == self.tag(addr):
+        i = (addr >> self.line_size_log2) & self.index_mask
+        if self.tags[i] == addr >> self.tag_shift:
             if set_dirty:
-                self.dirty.add(self.index(addr))
+                self.dirty[i] = 1
             return True
 
         return False
 
     def evict_for(self, addr: int) -> Optional[int]:
-        i = self.index(addr)
-        if self.tags[i] is not None:
-            tag = self.tags[i]
-            self.tags[i] = None
-            try:
-                self.dirty.remove(tag)
+        i = (addr >> self.line_size_log2) & self.index_mask
+        tag = self.tags[i]
+        if tag != _NO_TAG:
+            self.tags[i] = _NO_TAG
+            if self.dirty[i]:
+                self.dirty[i] = 0
                 return (
                     (tag << self.index_size_log2) | i) << self.line_size_log2
-            except KeyError:
-                pass
         return None
 
     def insert(self, addr: int, dirty: bool) -> None:
-        self.tags[self.index(addr)] = self.tag(addr)
-        if dirty:
-            self.dirty.add(self.index(addr))
-        else:
-            self.dirty.discard(self.index(addr))
+        i = (addr >> self.line_size_log2) & self.index_mask
+        self.tags[i] = addr >> self.tag_shift
+        self.dirty[i] = dirty
 
     def take(self, addr: int) -> bool:
-        self.tags[self.index(addr)] = None
-        try:
-            self.dirty.remove(self.tag(addr))
-            return True
-        except KeyError:
-            return False
+        i = (addr >> self.line_size_log2) & self.index_mask
+        self.tags[i] = _NO_TAG
+        dirty = self.dirty[i]
+        self.dirty[i] = 0
+        return bool(dirty)
 
 
 class SetAssocMem:
     """Set associative."""
 
+    __slots__ = ("line_size_log2", "index_size_log2", "tags", "index_mask",
+                 "tag_shift")
+
     def __init__(self, desc, line_size_log2: int, size_log2: int) -> None:
         self.line_size_log2 = line_size_log2
 
         # TODO(sflur): handle size that is not power of 2?
-        set_size_log2 = int(math.log2(desc["set_size"]))
+        set_size_log2 = int_log2(desc["set_size"])
         self.index_size_log2 = size_log2 - self.line_size_log2 - set_size_log2
 
         if desc["replacement"] == "LRU":
@@ -145,27 +160,33 @@ class SetAssocMem:
         else:
             assert False
 
+        # Used by index() and tag(), which are inlined in the methods below.
+        self.index_mask = (1 << self.index_size_log2) - 1
+        self.tag_shift = self.line_size_log2 + self.index_size_log2
+
     def index(self, addr: int) -> int:
-        mask = (1 << self.index_size_log2) - 1
-        return (addr >> self.line_size_log2) & mask
+        return (addr >> self.line_size_log2) & self.index_mask
 
     def tag(self, addr: int) -> int:
-        return addr >> (self.line_size_log2 + self.index_size_log2)
+        return addr >> self.tag_shift
 
     def line_addr(self, addr: int) -> int:
         return (addr >> self.line_size_log2) << self.line_size_log2
 
     def try_access(self, addr: int, set_dirty: bool) -> bool:
-        return self.tags[self.index(addr)].try_access(self.tag(addr), set_dirty)
+        lru_set = self.tags[(addr >> self.line_size_log2) & self.index_mask]
+        return lru_set.try_access(addr >> self.tag_shift, set_dirty)
 
     def insert(self, addr: int, dirty: bool) -> None:
-        self.tags[self.index(addr)].insert(self.tag(addr), dirty)
+        lru_set = self.tags[(addr >> self.line_size_log2) & self.index_mask]
+        lru_set.insert(addr >> self.tag_shift, dirty)
 
     def take(self, addr: int) -> bool:
-        return self.tags[self.index(addr)].take(self.tag(addr))
+        lru_set = self.tags[(addr >> self.line_size_log2) & self.index_mask]
+        return lru_set.take(addr >> self.tag_shift)
 
     def evict_for(self, addr: int) -> Optional[int]:
-        i = self.index(addr)
+        i = (addr >> self.line_size_log2) & self.index_mask
         tag = self.tags[i].evict()
         return (((tag << self.index_size_log2) | i) << self.line_size_log2
                 if tag is not None else None)
@@ -184,38 +205,72 @@ def load_mem(desc, line_size_log2: int, size_log2: int):
 
 BYTE_UNITS = {"b": 0, "kb": 10, "mb": 20, "gb": 30, "tb": 40}
 
+_BYTES_RE = re.compile(r"^(\d+)\s*(.*)")
+
 
 def parse_bytes_to_log2(x: Union[int, str]) -> int:
     u = 0
     if isinstance(x, str):
-        m = re.match(r"^(\d+)\s*(.*)", x)
+        m = _BYTES_RE.match(x)
         assert m
         x = int(m.group(1))
         if m.group(2):
             u = BYTE_UNITS[m.group(2).lower()]
 
-    assert x > 0
-    return int(math.log2(x)) + u
+    return int_log2(x) + u
+
+
+# States of the memory elements (CacheFront, Cache and MainMemory).
+_IDLE = 0
+_STALL = 1
+_MISS = 2
+_WRITE_THROUGH = 3
+_STALL_PARENT = 4
 
 
 class CacheFront:
     """Cache that supports load/store."""
 
+    __slots__ = ("parent", "parent_request", "take_parent_reply", "mem",
+                 "mem_try_access", "write_policy", "latencies", "tock",
+                 "front_reqs", "read_replys", "write_replys", "state",
+                 "state_delay", "state_req")
+
     def __init__(self, desc, parent) -> None:
         self.parent = parent
+        # Bound once, as they are used on every request/reply.
+        self.parent_request = parent.front_reqs.append
+        self.take_parent_reply = parent.take_child_reply
 
         # TODO(sflur): report an error if not divisible by 8?
-        line_size_log2 = int(
-            math.log2(desc["line_size"] // 8))
+        line_size_log2 = int_log2(desc["line_size"] // 8)
         size_log2 = parse_bytes_to_log2(desc["size"])
         self.mem = load_mem(desc["placement"], line_size_log2, size_log2)
+        # Bound once, as it's called for every load/store.
+        self.mem_try_access = self.mem.try_access
 
         self.write_policy = desc["write_policy"]
         self.latencies = desc["latencies"]
 
+        # The write policy doesn't change, so instead of checking it on every
+        # call, `tock` is bound to a method that is specialised for it.
+        if self.write_policy == "write_back":
+            self.tock = self._tock_write_back
+        else:
+            assert self.write_policy == "write_through"
+            self.tock = self._tock_write_through
+
         self.front_reqs = collections.deque()
-        self.front_replys = collections.defaultdict(collections.deque)
-        self.state = None
+        # Replies to "write" requests are kept apart from the replies to all
+        # other requests ("read", "fetch_read" and "fetch_write"), so they can
+        # be taken without filtering.
+        self.read_replys = collections.defaultdict(collections.deque)
+        self.write_replys = collections.defaultdict(collections.deque)
+        # The state is kept in separate fields (instead of a tuple) so the
+        # per-cycle updates don't allocate.
+        self.state = _IDLE
+        self.state_delay = 0
+        self.state_req = None
 
     def issue_load(self, uid, addr) -> None:
         self.front_reqs.append(("read", uid, addr))
@@ -224,95 +279,94 @@ class CacheFront:
         self.front_reqs.append(("write", uid, addr))
 
     def take_load_replys(self, uid) -> Sequence[int]:
-        res = collections.deque()
-        replys = self.front_replys[uid]
-        for _ in range(len(replys)):
-            if replys[0][0] == "read":
-                res.append(replys.popleft()[2])
-            else:
-                replys.rotate()
-
-        if not replys:
-            del self.front_replys[uid]
-
-        return res
+        replys = self.read_replys.pop(uid, None)
+        return [r[2] for r in replys] if replys else []
 
     def take_store_replys(self, uid) -> Sequence[int]:
-        res = collections.deque()
-        replys = self.front_replys[uid]
-        for _ in range(len(replys)):
-            if replys[0][0] == "write":
-                res.append(replys.popleft()[2])
-            else:
-                replys.rotate()
-
-        if not replys:
-            del self.front_replys[uid]
-
-        return res
+        replys = self.write_replys.pop(uid, None)
+        return [r[2] for r in replys] if replys else []
 
     def tick(self) -> None:
-        if self.state:
-            if self.state[0] == "stall":
-                _, delay, res = self.state
-                if delay > 0:
-                    self.state = ("stall", delay - 1, res)
+        if self.state == _STALL:
+            if self.state_delay > 0:
+                self.state_delay -= 1
+            else:
+                res = self.state_req
+                if res[0] == "write":
+                    self.write_replys[res[1]].append(res)
                 else:
-                    self.front_replys[res[1]].append(res)
-                    self.state = None
-
-            elif self.state[0] == "miss":
-                _, req = self.state
-                cmd, _, addr = req
-                write_back_addr = self.mem.evict_for(addr)
-                if write_back_addr is not None:
-                    self.parent.front_reqs.append(
-                        ("write", self, write_back_addr))
-                self.parent.front_reqs.append((f"fetch_{cmd}", self, addr))
-                self.state = ("stall-parent", req)
-
-            elif self.state[0] == "write-through":
-                _, req = self.state
-                _, _, addr = req
-                self.parent.front_reqs.append(("write", self, addr))
-                self.state = ("stall-parent", req)
+                    self.read_replys[res[1]].append(res)
+                self.state = _IDLE
+                self.state_req = None
+
+        elif self.state == _MISS:
+            cmd, _, addr = self.state_req
+            write_back_addr = self.mem.evict_for(addr)
+            if write_back_addr is not None:
+                self.parent_request(("write", self, write_back_addr))
+            self.parent_request((f"fetch_{cmd}", self, addr))
+            self.state = _STALL_PARENT
+
+        elif self.state == _WRITE_THROUGH:
+            _, _, addr = self.state_req
+            self.parent_request(("write", self, addr))
+            self.state = _STALL_PARENT
+
+    def _tock_write_back(self) -> None:
+        """`tock` of a write-back cache."""
+        if self.state == _IDLE and self.front_reqs:
+            req = self.front_reqs.popleft()
+            self.state_req = req
+            cmd, _, addr = req
+            assert cmd in ["read", "write"]
+            if self.mem_try_access(addr, cmd == "write"):
+                self.state = _STALL
+                self.state_delay = self.latencies[cmd] - 1
+            else:
+                self.state = _MISS
+
+        if (self.state == _STALL_PARENT and
+                (reply := self.take_parent_reply(self)) is not None):
+            if reply[0] in ["fetch_read", "fetch_write"]:
+                cmd, _, addr = self.state_req
+                self.mem.insert(addr, cmd == "write")
+                self.state = _STALL
+                self.state_delay = self.latencies[cmd] - 1
+            else:
+                # It's the reply for a write-back, we still need to wait for
+                # the fetch, hence `self.state` stays the same.
+                assert reply[0] == "write"
 
-    def tock(self) -> None:
-        if not self.state and self.front_reqs:
+    def _tock_write_through(self) -> None:
+        """`tock` of a write-through cache."""
+        if self.state == _IDLE and self.front_reqs:
             req = self.front_reqs.popleft()
-            if req[0] in ["read", "write"]:
-                cmd, _, addr = req
-                if self.mem.try_access(
-                        addr, cmd == "write" and
-                        self.write_policy == "write_back"):
-                    if cmd == "write" and self.write_policy == "write_through":
-                        self.state = ("write-through", req)
-                    else:
-                        self.state = ("stall", self.latencies[cmd] - 1, req)
+            self.state_req = req
+            cmd, _, addr = req
+            assert cmd in ["read", "write"]
+            if self.mem_try_access(addr, False):
+                if cmd == "write":
+                    self.state = _WRITE_THROUGH
                 else:
-                    self.state = ("miss", req)
+                    self.state = _STALL
+                    self.state_delay = self.latencies[cmd] - 1
             else:
-                assert False
+                self.state = _MISS
 
-        if (self.state and self.state[0] == "stall-parent" and
-                self.parent.front_replys[self]):
-            reply = self.parent.front_replys[self].popleft()
+        if (self.state == _STALL_PARENT and
+                (reply := self.take_parent_reply(self)) is not None):
             if reply[0] == "write":
-                _, req = self.state
-                if self.write_policy == "write_through":
-                    self.state = ("stall", self.latencies[req[0]] - 1, req)
-                # else: it's a write-back, we still need to wait for the fetch,
-                # hence `self.state` stays the same.
+                self.state = _STALL
+                self.state_delay = self.latencies[self.state_req[0]] - 1
             elif reply[0] in ["fetch_read", "fetch_write"]:
-                _, req = self.state
-                cmd, _, addr = req
-                self.mem.insert(
-                    addr, cmd == "write" and self.write_policy == "write_back")
+                cmd, _, addr = self.state_req
+                self.mem.insert(addr, False)
 
-                if cmd == "write" and self.write_policy == "write_through":
-                    self.state = ("write-through", req)
+                if cmd == "write":
+                    self.state = _WRITE_THROUGH
                 else:
-                    self.state = ("stall", self.latencies[cmd] - 1, req)
+                    self.state = _STALL
+                    self.state_delay = self.latencies[cmd] - 1
             else:
                 assert False
 
@@ -320,12 +374,20 @@ class CacheFront:
 class Cache:
     """Cache that is part of a hierarchy (not front)."""
 
+    __slots__ = ("parent", "parent_request", "take_parent_reply", "children",
+                 "mem", "inclusion", "write_policy", "latencies", "tock",
+                 "front_reqs", "read_replys", "write_replys", "state",
+                 "state_delay", "state_req")
+
     def __init__(self, desc, parent) -> None:
         self.parent = parent
+        # Bound once, as they are used on every request/reply.
+        self.parent_request = parent.front_reqs.append
+        self.take_parent_reply = parent.take_child_reply
         self.children = []
 
         # TODO(sflur): report an error if not divisible by 8?
-        line_size_log2 = int(math.log2(desc["line_size"] // 8))
+        line_size_log2 = int_log2(desc["line_size"] // 8)
         size_log2 = parse_bytes_to_log2(desc["size"])
         self.mem = load_mem(desc["placement"], line_size_log2, size_log2)
 
@@ -333,92 +395,143 @@ class Cache:
         self.write_policy = desc["write_policy"]
         self.latencies = desc["latencies"]
 
+        # See CacheFront.
+        if self.write_policy == "write_back":
+            self.tock = self._tock_write_back
+        else:
+            assert self.write_policy == "write_through"
+            self.tock = self._tock_write_through
+
         self.front_reqs = collections.deque()
-        self.front_replys = collections.defaultdict(collections.deque)
-        self.state = None
+        # Replies to "write" requests are kept apart from the replies to all
+        # other requests ("read", "fetch_read" and "fetch_write"), so they can
+        # be taken without filtering.
+        self.read_replys = collections.defaultdict(collections.deque)
+        self.write_replys = collections.defaultdict(collections.deque)
+        self.state = _IDLE
+        self.state_delay = 0
+        self.state_req = None
+
+    def take_child_reply(self, child):
+        """Take the next reply to a request from `child`, or None if none."""
+        # Requests are served in order, so when a child issues a write-back
+        # followed by a fetch, the write is replied first.
+        for replys in (self.write_replys, self.read_replys):
+            # Not `replys[child]`, which would add an empty deque to the
+            # defaultdict.
+            queue = replys.get(child)
+            if queue:
+                reply = queue.popleft()
+                if not queue:
+                    del replys[child]
+                return reply
+        return None
 
     def tick(self) -> None:
-        if self.state:
-            if self.state[0] == "stall":
-                _, delay, res = self.state
-                if delay > 0:
-                    self.state = ("stall", delay - 1, res)
+        if self.state == _STALL:
+            if self.state_delay > 0:
+                self.state_delay -= 1
+            else:
+                res = self.state_req
+                if res[0] == "write":
+                    self.write_replys[res[1]].append(res)
                 else:
-                    self.front_replys[res[1]].append(res)
-                    self.state = None
-
-            elif self.state[0] == "miss":
-                _, req = self.state
-                if req[0] in ["fetch_read", "fetch_write"]:
-                    cmd, _, addr = req
-                    if self.inclusion == "inclusive":
-                        write_back_addr = self.mem.evict_for(addr)
-                        if write_back_addr is not None:
-                            self.parent.front_reqs.append(
-                                ("write", self, write_back_addr))
-                    self.parent.front_reqs.append((cmd, self, addr))
-                    self.state = ("stall-parent", req)
-
-                elif req[0] == "write":
-                    _, _, addr = req
+                    self.read_replys[res[1]].append(res)
+                self.state = _IDLE
+                self.state_req = None
+
+        elif self.state == _MISS:
+            req = self.state_req
+            if req[0] in ["fetch_read", "fetch_write"]:
+                cmd, _, addr = req
+                if self.inclusion == "inclusive":
                     write_back_addr = self.mem.evict_for(addr)
                     if write_back_addr is not None:
-                        self.parent.front_reqs.append(
-                            ("write", self, write_back_addr))
-                    self.parent.front_reqs.append(("fetch_write", self, addr))
-                    self.state = ("stall-parent", req)
+                        self.parent_request(("write", self, write_back_addr))
+                self.parent_request((cmd, self, addr))
+                self.state = _STALL_PARENT
 
-            elif self.state[0] == "write-through":
-                _, req = self.state
+            elif req[0] == "write":
                 _, _, addr = req
-                self.parent.front_reqs.append(("write", self, addr))
-                self.state = ("stall-parent", req)
+                write_back_addr = self.mem.evict_for(addr)
+                if write_back_addr is not None:
+                    self.parent_request(("write", self, write_back_addr))
+                self.parent_request(("fetch_write", self, addr))
+                self.state = _STALL_PARENT
+
+        elif self.state == _WRITE_THROUGH:
+            _, _, addr = self.state_req
+            self.parent_request(("write", self, addr))
+            self.state = _STALL_PARENT
+
+    def _accept_fetch(self, cmd: str, addr: int) -> None:
+        """Start serving a "fetch_read"/"fetch_write" request."""
+        if self.mem.try_access(addr, False):
+            if self.inclusion == "exclusive":
+                _dirty = self.mem.take(addr)
+            # TODO(sflur): pass the dirty bit
+            self.state = _STALL
+            self.state_delay = self.latencies[cmd] - 1
+        else:
+            self.state = _MISS
 
-    def tock(self) -> None:
-        if not self.state and self.front_reqs:
+    def _tock_write_back(self) -> None:
+        """`tock` of a write-back cache."""
+        if self.state == _IDLE and self.front_reqs:
             req = self.front_reqs.popleft()
-            if req[0] in ["fetch_read", "fetch_write"]:
-                cmd, _, addr = req
-                if self.mem.try_access(addr, False):
-                    if self.inclusion == "exclusive":
-                        _dirty = self.mem.take(addr)
-                    # TODO(sflur): pass the dirty bit
-                    self.state = ("stall", self.latencies[cmd] - 1, req)
+            self.state_req = req
+            cmd, _, addr = req
+            if cmd == "write":
+                if self.mem.try_access(addr, True):
+                    self.state = _STALL
+                    self.state_delay = self.latencies[cmd] - 1
                 else:
-                    self.state = ("miss", req)
+                    self.state = _MISS
+            else:
+                assert cmd in ["fetch_read", "fetch_write"]
+                self._accept_fetch(cmd, addr)
+
+        if (self.state == _STALL_PARENT and
+                (reply := self.take_parent_reply(self)) is not None):
+            if reply[0] in ["fetch_read", "fetch_write"]:
+                cmd, _, addr = self.state_req
+                self.mem.insert(addr, cmd == "write")
+                self.state = _STALL
+                self.state_delay = self.latencies[cmd] - 1
+            else:
+                # It's the reply for a write-back, we still need to wait for
+                # the fetch, hence `self.state` stays the same.
+                assert reply[0] == "write"
 
-            elif req[0] == "write":
-                cmd, _, addr = req
-                if self.mem.try_access(addr, self.write_policy == "write_back"):
-                    if self.write_policy == "write_back":
-                        self.state = ("stall", self.latencies[cmd] - 1, req)
-                    if self.write_policy == "write_through":
-                        self.state = ("write-through", req)
+    def _tock_write_through(self) -> None:
+        """`tock` of a write-through cache."""
+        if self.state == _IDLE and self.front_reqs:
+            req = self.front_reqs.popleft()
+            self.state_req = req
+            cmd, _, addr = req
+            if cmd == "write":
+                if self.mem.try_access(addr, False):
+                    self.state = _WRITE_THROUGH
                 else:
-                    self.state = ("miss", req)
-
+                    self.state = _MISS
             else:
-                assert False
+                assert cmd in ["fetch_read", "fetch_write"]
+                self._accept_fetch(cmd, addr)
 
-        if (self.state and self.state[0] == "stall-parent" and
-                self.parent.front_replys[self]):
-            reply = self.parent.front_replys[self].popleft()
+        if (self.state == _STALL_PARENT and
+                (reply := self.take_parent_reply(self)) is not None):
             if reply[0] == "write":
-                _, req = self.state
-                if self.write_policy == "write_through":
-                    self.state = ("stall", self.latencies[req[0]] - 1, req)
-                # else: it's a write-back, we still need to wait for the fetch,
-                # hence `self.state` stays the same.
+                self.state = _STALL
+                self.state_delay = self.latencies[self.state_req[0]] - 1
             elif reply[0] in ["fetch_read", "fetch_write"]:
-                _, req = self.state
-                cmd, _, addr = req
-                self.mem.insert(
-                    addr, cmd == "write" and self.write_policy == "write_back")
+                cmd, _, addr = self.state_req
+                self.mem.insert(addr, False)
 
-                if cmd == "write" and self.write_policy == "write_through":
-                    self.state = ("write-through", req)
+                if cmd == "write":
+                    self.state = _WRITE_THROUGH
                 else:
-                    self.state = ("stall", self.latencies[cmd] - 1, req)
+                    self.state = _STALL
+                    self.state_delay = self.latencies[cmd] - 1
             else:
                 assert False
 
@@ -426,14 +539,23 @@ class Cache:
 class MainMemory:
     """Main memory."""
 
+    __slots__ = ("children", "latencies", "front_reqs", "read_replys",
+                 "write_replys", "state", "state_delay", "state_req")
+
     def __init__(self, desc) -> None:
         self.children = []
 
         self.latencies = desc["latencies"]
 
         self.front_reqs = collections.deque()
-        self.front_replys = collections.defaultdict(collections.deque)
-        self.state = None
+        # Replies to "write" requests are kept apart from the replies to all
+        # other requests ("read", "fetch_read" and "fetch_write"), so they can
+        # be taken without filtering.
+        self.read_replys = collections.defaultdict(collections.deque)
+        self.write_replys = collections.defaultdict(collections.deque)
+        self.state = _IDLE
+        self.state_delay = 0
+        self.state_req = None
 
     def issue_load(self, uid, addr) -> None:
         self.front_reqs.append(("read", uid, addr))
@@ -442,48 +564,48 @@ class MainMemory:
         self.front_reqs.append(("write", uid, addr))
 
     def take_load_replys(self, uid) -> Sequence[int]:
-        res = collections.deque()
-        replys = self.front_replys[uid]
-        for _ in range(len(replys)):
-            if replys[0][0] == "read":
-                res.append(replys.popleft()[2])
-            else:
-                replys.rotate()
-
-        if not replys:
-            del self.front_replys[uid]
-
-        return res
+        replys = self.read_replys.pop(uid, None)
+        return [r[2] for r in replys] if replys else []
 
     def take_store_replys(self, uid) -> Sequence[int]:
-        res = collections.deque()
-        replys = self.front_replys[uid]
-        for _ in range(len(replys)):
-            if replys[0][0] == "write":
-                res.append(replys.popleft()[2])
-            else:
-                replys.rotate()
-
-        if not replys:
-            del self.front_replys[uid]
-
-        return res
+        replys = self.write_replys.pop(uid, None)
+        return [r[2] for r in replys] if replys else []
+
+    def take_child_reply(self, child):
+        """Take the next reply to a request from `child`, or None if none."""
+        # Requests are served in order, so when a child issues a write-back
+        # followed by a fetch, the write is replied first.
+        for replys in (self.write_replys, self.read_replys):
+            # Not `replys[child]`, which would add an empty deque to the
+            # defaultdict.
+            queue = replys.get(child)
+            if queue:
+                reply = queue.popleft()
+                if not queue:
+                    del replys[child]
+                return reply
+        return None
 
     def tick(self) -> None:
-        if self.state:
-            if self.state[0] == "stall":
-                _, delay, res = self.state
-                if delay > 0:
-                    self.state = ("stall", delay - 1, res)
+        if self.state == _STALL:
+            if self.state_delay > 0:
+                self.state_delay -= 1
+            else:
+                res = self.state_req
+                if res[0] == "write":
+                    self.write_replys[res[1]].append(res)
                 else:
-                    self.front_replys[res[1]].append(res)
-                    self.state = None
+                    self.read_replys[res[1]].append(res)
+                self.state = _IDLE
+                self.state_req = None
 
     def tock(self) -> None:
-        if self.state is None and self.front_reqs:
+        if self.state == _IDLE and self.front_reqs:
             req = self.front_reqs.popleft()
             if req[0] in ["read", "write", "fetch_read", "fetch_write"]:
-                self.state = ("stall", self.latencies[req[0]] - 1, req)
+                self.state = _STALL
+                self.state_delay = self.latencies[req[0]] - 1
+                self.state_req = req
             else:
                 assert False
 
@@ -500,6 +622,9 @@ class MemorySystem(interfaces.Module):
             for uid, d in desc["levels"].items():
                 self.load_element(uid, d, self.elements["main"])
 
+        # The elements are iterated on every cycle.
+        self._element_list = tuple(self.elements.values())
+
     def load_element(self, uid, desc, parent) -> None:
         front = "levels" not in desc
         if desc["type"] == "unified":
@@ -530,15 +655,21 @@ class MemorySystem(interfaces.Module):
     def tick(self, cntr: Counter) -> None:
         super().tick(cntr)
 
-        for e in self.elements.values():
-            e.tick()
+        for e in self._element_list:
+            # An idle element has nothing to do in tick.
+            if e.state != _IDLE:
+                e.tick()
 
     # Implements interfaces.Module
     def tock(self, cntr: Counter) -> None:
         super().tock(cntr)
 
-        for e in self.elements.values():
-            e.tock()
+        for e in self._element_list:
+            # In tock, an element either takes a new request (when it's idle)
+            # or takes a reply from its parent.
+            if ((e.state == _IDLE and e.front_reqs) or
+                    e.state == _STALL_PARENT):
+                e.tock()
 
     # Implements interfaces.Module
     def pending(self) -> int:
@@ -0,0 +1,59 @@
+# Copyright 2023 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for memory_system."""
+
+import unittest
+
+from memory_system import DirectMapMem
+
+
+class DirectMapMemTest(unittest.TestCase):
+    """Dirty line tracking of DirectMapMem."""
+
+    def setUp(self):
+        # 4 lines of 16 bytes.
+        self.mem = DirectMapMem(line_size_log2=4, size_log2=6)
+
+    def test_evict_dirty_line(self):
+        self.mem.insert(0x1230, dirty=False)
+        self.assertTrue(self.mem.try_access(0x1234, set_dirty=True))
+        # 0x5630 maps to the same line as 0x1230.
+        self.assertEqual(self.mem.evict_for(0x5630), 0x1230)
+        self.assertFalse(self.mem.try_access(0x1234, set_dirty=False))
+
+    def test_evict_clean_line(self):
+        self.mem.insert(0x1230, dirty=False)
+        self.assertIsNone(self.mem.evict_for(0x5630))
+
+    def test_insert_dirty_line(self):
+        self.mem.insert(0x1230, dirty=True)
+        self.assertEqual(self.mem.evict_for(0x5630), 0x1230)
+        # The dirty bit is cleared by the eviction.
+        self.mem.insert(0x5630, dirty=False)
+        self.assertIsNone(self.mem.evict_for(0x1230))
+
+    def test_take_dirty_line(self):
+        self.mem.insert(0x1230, dirty=False)
+        self.mem.try_access(0x1230, set_dirty=True)
+        self.assertTrue(self.mem.take(0x1230))
+        self.assertFalse(self.mem.try_access(0x1230, set_dirty=False))
+
+    def test_take_clean_line(self):
+        self.mem.insert(0x1230, dirty=False)
+        self.assertFalse(self.mem.take(0x1230))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,14 +18,23 @@
 
 
 import argparse
-import pickle
+import multiprocessing
 import sys
-from typing import Sequence
+from typing import Iterator, Sequence
 
 
 from counter import Counter
 
 
+def load_counters(files: Sequence[str]) -> Iterator[Counter]:
+    for cfile in files:
+        yield Counter.load(cfile)
+
+
+def sum_files(files: Sequence[str]) -> Counter:
+    return Counter.sum(load_counters(files))
+
+
 def main(argv: Sequence[str]) -> int:
     parser = argparse.ArgumentParser(description=__doc__)
 
@@ -33,6 +42,12 @@ def main(argv: Sequence[str]) -> int:
                         help="Print report to RFILE",
                         metavar="RFILE")
 
+    parser.add_argument("-j", "--jobs",
+                        type=int,
+                        default=1,
+                        help="Load and merge the files in N processes",
+                        metavar="N")
+
     parser.add_argument("files",
                         nargs="+",
                         help="TBM counter files",
@@ -40,18 +55,17 @@ def main(argv: Sequence[str]) -> int:
 
     args = parser.parse_args(argv)
 
-    data = None
-
-    for cfile in args.files:
-        with open(cfile, "rb") as ocfile:
-            new: Counter = pickle.load(ocfile)
-
-        if data is None:
-            data = new
-        else:
-            data += new
-
-    assert data
+    if args.jobs > 1 and len(args.files) > 1:
+        # Each process merges a contiguous slice of the files, and the partial
+        # sums are then merged here.
+        jobs = min(args.jobs, len(args.files))
+        step = -(-len(args.files) // jobs)
+        slices = [args.files[i:i + step]
+                  for i in range(0, len(args.files), step)]
+        with multiprocessing.Pool(jobs) as pool:
+            data = Counter.sum(pool.imap(sum_files, slices))
+    else:
+        data = sum_files(args.files)
 
     if args.report:
         with open(args.report, "w", encoding="ascii") as out:
@@ -39,6 +39,13 @@ class ScalarPipe(interfaces.ExecPipeline):
         # The pipeline
         self._pipelined = desc["pipelined"]
         self._stage = collections.deque([None] * self.depth)
+        # The number of stages that are not None.
+        self._occupied_stages = 0
+        # Whether the pipe is pipelined doesn't change, so instead of checking
+        # it on every call, `is_ready` is bound to a method that is
+        # specialised for it.
+        self.is_ready = (self._is_ready_pipelined if self._pipelined
+                         else self._is_ready_not_pipelined)
 
         # The writeback buffer
         self._writebackq = BufferedQueue(desc.get("writeback_buff_size"))
@@ -49,108 +56,131 @@ class ScalarPipe(interfaces.ExecPipeline):
 
         self._load_stage = desc.get("load_stage")
         self._fixed_load_latency = desc.get("fixed_load_latency")
+        # The stage at which a load waits for its reply.
+        self._load_reply_stage = (
+            self._load_stage + self._fixed_load_latency
+            if self._load_stage is not None else None)
+        # Maps instructions with an outstanding load to: None, before the load
+        # reaches the end of its fixed latency; True, while the pipe is stalled
+        # waiting for the reply; False, once the reply arrived. As instructions
+        # have at most one load, the instruction alone is used as the key.
         self._stalling_loads = {}
 
         self._store_stage = desc.get("store_stage")
         self._fixed_store_latency = desc.get("fixed_store_latency")
+        # The stage at which a store waits for its reply.
+        self._store_reply_stage = (
+            self._store_stage + self._fixed_store_latency
+            if self._store_stage is not None else None)
+        # Same as _stalling_loads, for stores.
         self._stalling_stores = {}
+        # The number of True values in _stalling_loads and _stalling_stores.
+        self._waiting_replies = 0
 
         self._rf_scoreboards = rf_scoreboards
 
+        # `cntr.utilizations[f"{self.name}.*"]`, set by `reset`.
+        self._util_eiq = None
+        self._util_pipe = None
+        self._util_wbq = None
+
     def reg_read_stall(self, instr: Instruction) -> bool:
-        return any(not self._rf_scoreboards[rf].can_read(instr, regs)
-                   for rf, regs in instr.inputs_by_type().items())
+        sbs = self._rf_scoreboards
+        for rf, regs in instr.inputs_by_type().items():
+            if not sbs[rf].can_read(instr, regs):
+                return True
+        return False
 
     def reg_write_stall(self, instr: Instruction) -> bool:
-        return any(not self._rf_scoreboards[rf].can_write(instr, regs)
-                   for rf, regs in instr.outputs_by_type().items())
+        sbs = self._rf_scoreboards
+        for rf, regs in instr.outputs_by_type().items():
+            if not sbs[rf].can_write(instr, regs):
+                return True
+        return False
 
     def sb_reg_read(self, instr: Instruction) -> None:
+        sbs = self._rf_scoreboards
         for rf, regs in instr.inputs_by_type().items():
-            self._rf_scoreboards[rf].read(instr, regs)
+            sbs[rf].read(instr, regs)
 
     def sb_buff_reg_write(self, instr: Instruction) -> None:
+        sbs = self._rf_scoreboards
         for rf, regs in instr.outputs_by_type().items():
-            self._rf_scoreboards[rf].buff_write(instr, regs)
+            sbs[rf].buff_write(instr, regs)
 
     def sb_reg_write(self, instr: Instruction) -> None:
+        sbs = self._rf_scoreboards
         for rf, regs in instr.outputs_by_type().items():
-            self._rf_scoreboards[rf].write(instr, regs)
+            sbs[rf].write(instr, regs)
 
     def do_reg_writeback(self) -> None:
-        if self._writebackq:
-            if not self.reg_write_stall(self._writebackq[0]):
-                instr = self._writebackq.popleft()
-                self.sb_reg_write(instr)
-                self.retired_instrs.append(instr)
+        """Write back the head of the (non-empty) writeback queue, if it can."""
+        if not self.reg_write_stall(self._writebackq[0]):
+            instr = self._writebackq.popleft()
+            self.sb_reg_write(instr)
+            self.retired_instrs.append(instr)
 
     def stall(self, cntr: Counter) -> bool:
         # Check if last stage needs to do reg writes, and the writeback buffer
         # is full.
-        if (self._stage[-1] and self._stage[-1].outputs_by_type() and
-            self._writebackq.is_buffer_full()):
+        last = self._stage[-1]
+        if (last and self._writebackq.is_buffer_full() and
+                last.outputs_by_type()):
             return True
 
         # Check if memory accesses are waiting for reply.
-        if (any(self._stalling_loads.values()) or
-            any(self._stalling_stores.values())):
+        if self._waiting_replies:
             cntr.scalar_load_store_stall += 1
             return True
 
         return False
 
     def do_load(self) -> None:
-        if self._load_stage is None:
-            return
-
-        if self._stage[self._load_stage]:
-            inst = self._stage[self._load_stage]
+        """Issue and wait for loads. Only for pipes with a load stage."""
+        if inst := self._stage[self._load_stage]:
             # TODO(sflur): handle multiple loads?
             assert len(inst.loads) <= 1
-            for load in inst.loads:
-                if (inst, load) not in self._stalling_loads:
-                    self._mem.issue_load(inst, load)
-                    self._stalling_loads[(inst, load)] = None
-
-        if self._stage[self._load_stage + self._fixed_load_latency]:
-            inst = self._stage[self._load_stage + self._fixed_load_latency]
-            for load in inst.loads:
-                if self._stalling_loads[(inst, load)] is None:
-                    self._stalling_loads[(inst, load)] = True
-            for load in self._mem.take_load_replys(inst):
-                self._stalling_loads[(inst, load)] = False
+            if inst.loads and inst not in self._stalling_loads:
+                self._mem.issue_load(inst, inst.loads[0])
+                self._stalling_loads[inst] = None
+
+        if inst := self._stage[self._load_reply_stage]:
+            if inst.loads and self._stalling_loads[inst] is None:
+                self._stalling_loads[inst] = True
+                self._waiting_replies += 1
+            if self._mem.take_load_replys(inst):
+                if self._stalling_loads[inst]:
+                    self._waiting_replies -= 1
+                self._stalling_loads[inst] = False
 
     def do_store(self) -> None:
-        if self._store_stage is None:
-            return
-
-        if self._stage[self._store_stage]:
-            inst = self._stage[self._store_stage]
+        """Issue and wait for stores. Only for pipes with a store stage."""
+        if inst := self._stage[self._store_stage]:
             # TODO(sflur): handle multiple stores?
             assert len(inst.stores) <= 1
-            for store in inst.stores:
-                if (inst, store) not in self._stalling_stores:
-                    self._mem.issue_store(inst, store)
-                    self._stalling_stores[(inst, store)] = None
-
-        if self._stage[self._store_stage + self._fixed_store_latency]:
-            inst = self._stage[self._store_stage + self._fixed_store_latency]
-            for store in inst.stores:
-                if self._stalling_stores[(inst, store)] is None:
-                    self._stalling_stores[(inst, store)] = True
-            for store in self._mem.take_store_replys(inst):
-                self._stalling_stores[(inst, store)] = False
+            if inst.stores and inst not in self._stalling_stores:
+                self._mem.issue_store(inst, inst.stores[0])
+                self._stalling_stores[inst] = None
+
+        if inst := self._stage[self._store_reply_stage]:
+            if inst.stores and self._stalling_stores[inst] is None:
+                self._stalling_stores[inst] = True
+                self._waiting_replies += 1
+            if self._mem.take_store_replys(inst):
+                if self._stalling_stores[inst]:
+                    self._waiting_replies -= 1
+                self._stalling_stores[inst] = False
 
     # Implements interfaces.ExecPipeline
     def reset(self, cntr: Counter) -> None:
         super().reset(cntr)
         # TODO(sflur): implement proper reset
-        cntr.utilizations[f"{self.name}.eiq"] = counter.Utilization(
-            self._eiq.size)
-        cntr.utilizations[f"{self.name}.pipe"] = counter.Utilization(
-            len(self._stage))
-        cntr.utilizations[f"{self.name}.wbq"] = counter.Utilization(
-            self._writebackq.size)
+        self._util_eiq = counter.Utilization(self._eiq.size)
+        cntr.utilizations[f"{self.name}.eiq"] = self._util_eiq
+        self._util_pipe = counter.Utilization(len(self._stage))
+        cntr.utilizations[f"{self.name}.pipe"] = self._util_pipe
+        self._util_wbq = counter.Utilization(self._writebackq.size)
+        cntr.utilizations[f"{self.name}.wbq"] = self._util_wbq
 
     # Implements interfaces.ExecPipeline
     def tick(self, cntr: Counter) -> None:
@@ -163,70 +193,79 @@ class ScalarPipe(interfaces.ExecPipeline):
 
         self.retired_instrs.clear()
 
-        self.do_reg_writeback()
+        # Nothing moves in an empty pipe (instructions dispatched in this
+        # tick are only visible in the EIQ after `tock`).
+        if not (self._occupied_stages or self._eiq or self._writebackq):
+            return
+
+        if self._writebackq:
+            self.do_reg_writeback()
+
+        stage = self._stage
 
         if not self.stall(cntr):
             # Cleanup self._stalling_loads
-            if (self._load_stage is not None and
-                    self._stage[self._load_stage + self._fixed_load_latency]):
-                inst = self._stage[self._load_stage + self._fixed_load_latency]
-                for load in inst.loads:
-                    # The assertion holds because self.stall() above is True.
-                    assert not self._stalling_loads.get((inst, load), False)
-                    del self._stalling_loads[(inst, load)]
+            if (self._load_reply_stage is not None and
+                    (inst := stage[self._load_reply_stage]) and
+                    inst.loads):
+                # The assertion holds because self.stall() above is True.
+                assert not self._stalling_loads.get(inst, False)
+                del self._stalling_loads[inst]
 
             # Cleanup self._stalling_stores
-            if (self._store_stage is not None and
-                    self._stage[self._store_stage + self._fixed_store_latency]):
-                inst = self._stage[self._store_stage +
-                                   self._fixed_store_latency]
-                for store in inst.stores:
-                    # The assertion holds because self.stall() above is True.
-                    del self._stalling_stores[(inst, store)]
+            if (self._store_reply_stage is not None and
+                    (inst := stage[self._store_reply_stage]) and
+                    inst.stores):
+                # The assertion holds because self.stall() above is True.
+                del self._stalling_stores[inst]
 
             # Shift stages
-            instr = self._stage.pop()
+            instr = stage.pop()
             if instr:
-                if instr.outputs_by_type().items():
+                self._occupied_stages -= 1
+                if instr.outputs_by_type():
                     self._writebackq.buffer(instr)
-                    cntr.utilizations[f"{self.name}.wbq"].count += 1
+                    self._util_wbq.count += 1
                     self.sb_buff_reg_write(instr)
                 else:
                     self.retired_instrs.append(instr)
-            self._stage.appendleft(None)
+            stage.appendleft(None)
 
-        self.do_load()
-        self.do_store()
+        if self._load_stage is not None:
+            self.do_load()
+        if self._store_stage is not None:
+            self.do_store()
 
         # Try to issue instructions from eiq to pipeline, until one succeeds.
+        # The instructions that failed before it are moved to the back of the
+        # queue; if all fail, the queue is left as is.
         if self.is_ready():
-            for _ in range(len(self._eiq)):
-                instr = self._eiq.popleft()
+            eiq = self._eiq
+            for i, instr in enumerate(eiq):
                 if self.try_issue(instr, cntr):
+                    eiq.rotate(-i)
+                    eiq.popleft()
                     break
 
-                self._eiq.append(instr)
-
     # Implements interfaces.ExecPipeline
     def tock(self, cntr: Counter) -> None:
         super().tock(cntr)
 
         self.retired_instrs.clear()
 
-        cntr.utilizations[f"{self.name}.pipe"].occupied += len(
-            list(1 for i in self._stage if i))
+        self._util_pipe.occupied += self._occupied_stages
 
         self._eiq.flush()
-        cntr.utilizations[f"{self.name}.eiq"].occupied += len(self._eiq)
+        self._util_eiq.occupied += len(self._eiq)
 
         self._writebackq.flush()
-        cntr.utilizations[f"{self.name}.wbq"].occupied += len(self._writebackq)
+        self._util_wbq.occupied += len(self._writebackq)
 
     # Implements interfaces.ExecPipeline
     def pending(self) -> int:
-        eiq_count = len(list(self._eiq.chain()))
-        pipe_count = len(list(1 for i in self._stage if i))
-        wbq_count = len(list(self._writebackq.chain()))
+        eiq_count = self._eiq.buffered_len()
+        pipe_count = self._occupied_stages
+        wbq_count = self._writebackq.buffered_len()
         return eiq_count + pipe_count + wbq_count
 
     # Implements interfaces.ExecPipeline
@@ -237,41 +276,49 @@ class ScalarPipe(interfaces.ExecPipeline):
         inputs = instr.inputs_by_type()
         outputs = instr.outputs_by_type()
 
-        for rf in inputs.keys() | outputs.keys():
-            reads = inputs.get(rf, [])
-            writes = outputs.get(rf, [])
-            self._rf_scoreboards[rf].insert_accesses(instr, reg_reads=reads,
-                                                     reg_writes=writes)
+        for rf, reads in inputs.items():
+            self._rf_scoreboards[rf].insert_accesses(
+                instr, reg_reads=reads, reg_writes=outputs.get(rf, ()))
+        for rf, writes in outputs.items():
+            if rf not in inputs:
+                self._rf_scoreboards[rf].insert_accesses(
+                    instr, reg_reads=(), reg_writes=writes)
 
         if not (self._can_skip_eiq and self.is_ready() and
                 self.try_issue(instr, cntr)):
             self._eiq.buffer(instr)
-            cntr.utilizations[f"{self.name}.eiq"].count += 1
+            self._util_eiq.count += 1
 
         if instr.loads or instr.stores:
             cntr.scalar_load_store += 1
 
         return True
 
-    def is_ready(self) -> bool:
-        """Check if the pipe is ready to accept a new instruction."""
-        if self._pipelined:
-            return self._stage[0] is None
+    def _is_ready_pipelined(self) -> bool:
+        """Check if the (pipelined) pipe can accept a new instruction."""
+        return self._stage[0] is None
 
-        return all(s is None for s in self._stage)
+    def _is_ready_not_pipelined(self) -> bool:
+        """Check if the (not pipelined) pipe can accept a new instruction."""
+        return not self._occupied_stages
 
     def try_issue(self, instr: Instruction, cntr: Counter) -> bool:
         """Issue an instruction."""
 
-        if not all(sb.can_issue(instr) for sb in self._rf_scoreboards.values()):
-            return False
+        # An instruction that no scoreboard tracks (see
+        # `Instruction.scoreboards_mask`) has no register accesses to check.
+        if instr.scoreboards_mask:
+            if not all(sb.can_issue(instr)
+                       for sb in self._rf_scoreboards.values()):
+                return False
 
-        if self.reg_read_stall(instr):
-            return False
+            if self.reg_read_stall(instr):
+                return False
 
         assert self._stage[0] is None
         self._stage[0] = instr
-        cntr.utilizations[f"{self.name}.pipe"].count += 1
+        self._occupied_stages += 1
+        self._util_pipe.count += 1
 
         for sb in self._rf_scoreboards.values():
             sb.issue(instr)
@@ -282,10 +329,10 @@ class ScalarPipe(interfaces.ExecPipeline):
 
     # Implements interfaces.ExecPipeline
     def print_state_detailed(self, file) -> None:
-        eiq_str = ", ".join(str(i) for i in reversed(list(self._eiq.chain())))
+        eiq_str = ", ".join(str(i) for i in self._eiq.reversed_chain())
         stages = ", ".join(str(i) if i else "-" for i in self._stage)
         wbq_str = ", ".join(
-            str(i) for i in reversed(list(self._writebackq.chain())))
+            str(i) for i in self._writebackq.reversed_chain())
 
         pipe_str = (f"{eiq_str if eiq_str else '-'}"
                     f" > {stages}"
@@ -299,10 +346,10 @@ class ScalarPipe(interfaces.ExecPipeline):
 
     # Implements interfaces.ExecPipeline
     def get_state_three_valued(self, vals: Sequence[str]) -> Sequence[str]:
-        if all(self._stage):
+        if self._occupied_stages == len(self._stage):
             # Full
             pipe_str = vals[2]
-        elif any(self._stage):
+        elif self._occupied_stages:
             # Partial
             pipe_str = vals[1]
         else:
@@ -12,12 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import logging
 from typing import Any, Dict, Iterable, Sequence
 
 from buffered_queue import BufferedQueue
 import counter
 from counter import Counter
-from instruction import Instruction
+from instruction import Instruction, conflicts_with_masks
 import interfaces
 
 
@@ -34,6 +35,19 @@ class SchedUnit(interfaces.SchedUnit):
         self._fetch_unit = None
         self._exec_unit = None
 
+        # `(q, u)` pairs, where `u` is the utilization counter of the queue `q`.
+        # Set by `reset`.
+        self._queue_utilizations = ()
+
+        # Maps queue IDs to `(inputs, outputs)`, the OR of the register masks
+        # (see `Instruction.inputs_mask`) of the instructions in the queue.
+        # Computed lazily by `check_conflicts`, as the exec unit dequeues
+        # instructions before `tick`; `None` when it needs to be recomputed.
+        self._queue_masks = None
+
+        # Whether `self.log` messages are printed, set by `reset`.
+        self._log_enabled = False
+
         ## Current states
         self._queues = {}
         self._branch_stalling = False
@@ -65,11 +79,16 @@ class SchedUnit(interfaces.SchedUnit):
         cntr.stalls[self.name] = 0
         for uid, q in self._queues.items():
             cntr.utilizations[uid] = counter.Utilization(q.size)
+        self._queue_utilizations = tuple(
+            (q, cntr.utilizations[uid]) for uid, q in self._queues.items())
+        self._log_enabled = self.logger.isEnabledFor(logging.INFO)
 
     # Implements interfaces.SchedUnit
     def tick(self, cntr: Counter) -> None:
         super().tick(cntr)
 
+        self._queue_masks = None
+
         if self._branch_stalling:
             self.log("queuing stalled: unresolved branch")
             return
@@ -98,11 +117,14 @@ class SchedUnit(interfaces.SchedUnit):
                 # TODO(sflur): Currently flush instructions wait in the fetch
                 # queue, is that the right place to wait in?
                 cntr.stalls[self.name] += 1
-                self.log(f"queueing stalled: flush in effect: {fetched_instr}")
+                if self._log_enabled:
+                    self.log("queueing stalled: flush in effect:"
+                             f" {fetched_instr}")
                 break
 
             if fetched_instr.is_nop:
-                self.log(f"retired NOP instruction: {fetched_instr}")
+                if self._log_enabled:
+                    self.log(f"retired NOP instruction: {fetched_instr}")
                 self._fetch_unit.queue.dequeue()
                 cntr.retired_instruction_count += 1
                 continue
@@ -112,7 +134,8 @@ class SchedUnit(interfaces.SchedUnit):
             # Check if the queue is available.
             if self._queues[qid].is_buffer_full():
                 cntr.stalls[self.name] += 1
-                self.log(f"queueing stalled: '{qid}' is full")
+                if self._log_enabled:
+                    self.log(f"queueing stalled: '{qid}' is full")
                 break
 
             # TODO(sflur): instead of check_conflicts, we could add the
@@ -126,9 +149,15 @@ class SchedUnit(interfaces.SchedUnit):
 
             # It is safe to queue the instruction.
             self._queues[qid].buffer(fetched_instr)
+            if self._queue_masks is not None:
+                inputs, outputs = self._queue_masks[qid]
+                self._queue_masks[qid] = (
+                    inputs | fetched_instr.inputs_mask(),
+                    outputs | fetched_instr.outputs_mask())
             self._fetch_unit.queue.dequeue()
             cntr.utilizations[qid].count += 1
-            self.log(f"instruction '{fetched_instr}' queued")
+            if self._log_enabled:
+                self.log(f"instruction '{fetched_instr}' queued")
 
             if fetched_instr.is_branch:
                 cntr.branch_count += 1
@@ -148,8 +177,8 @@ class SchedUnit(interfaces.SchedUnit):
             self._branch_stalling = self._next_branch_stalling
             self._next_branch_stalling = None
 
-        for uid, q in self._queues.items():
-            cntr.utilizations[uid].occupied += len(q)
+        for q, util in self._queue_utilizations:
+            util.occupied += len(q)
 
     def check_conflicts(self, new_instr: Instruction, qid: str) -> bool:
         """Check if `instr` conflicts with other instructions.
@@ -166,15 +195,23 @@ class SchedUnit(interfaces.SchedUnit):
           True if there are no conflicts, False otherwise.
         """
 
-        for name, q in self._queues.items():
+        if self._queue_masks is None:
+            self._queue_masks = {}
+            for name, q in self._queues.items():
+                inputs = outputs = 0
+                for instr in q.chain():
+                    inputs |= instr.inputs_mask()
+                    outputs |= instr.outputs_mask()
+                self._queue_masks[name] = (inputs, outputs)
+
+        for name, (inputs, outputs) in self._queue_masks.items():
             if name == qid:
                 # skip the queue new_instr is going to, as it's an in-order
                 # queue.
                 continue
 
-            for instr in q.chain():
-                if new_instr.conflicts_with(instr):
-                    return False
+            if conflicts_with_masks(new_instr, inputs, outputs):
+                return False
 
         return True
 
@@ -15,27 +15,61 @@
 """scoreboard module."""
 
 import collections
+import itertools
 import sys
-from typing import Any, Dict, Sequence, Tuple
+from typing import Any, Dict, Iterable, Sequence, Tuple
 
 from counter import Counter
+import instruction
 from instruction import Instruction
 import interfaces
 
 
+# Vector registers are tracked by `VecPreemptive` per slice. Slice `s` of the
+# register with ID `rid` (see `instruction.reg_id`) is identified by
+# `slice_id(rid, s)`.
+SLICE_BITS = 8
+SLICE_MASK = (1 << SLICE_BITS) - 1
+
+
+def slice_id(rid: int, s: int) -> int:
+    return (rid << SLICE_BITS) | s
+
+
+# Source of the scoreboards' bits in `Instruction.scoreboards_mask`.
+_next_bit_index = itertools.count()
+
+
 class Preemptive(interfaces.Scoreboard):
     """Scoreboard that stalls functional units."""
 
+    __slots__ = ("read_ports", "dedicated_read_ports", "write_ports",
+                 "dedicated_write_ports", "rw_deps", "ww_deps",
+                 "rw_dependents", "ww_dependents", "wr_deps", "wr_dependents",
+                 "writes", "reads", "issued", "unresolved_rw", "unresolved_ww",
+                 "unresolved_wr", "unwritten_rw", "write_buff",
+                 "used_read_ports", "used_write_ports", "bit",
+                 "_read_port_regs_memo", "_write_port_regs_memo")
+
     def __init__(self, uid: str, desc: Dict[str, Any]) -> None:
         super().__init__(uid)
 
+        # The bit of this scoreboard in `Instruction.scoreboards_mask`. It is
+        # set while the instruction is in `self.rw_deps` or `self.ww_deps`.
+        self.bit = 1 << next(_next_bit_index)
+
+        # Registers are identified by their IDs (see `instruction.reg_id`).
+
         # `None` means unrestricted
         self.read_ports = desc.get("read_ports")
-        self.dedicated_read_ports = set(desc.get("dedicated_read_ports", []))
+        self.dedicated_read_ports = frozenset(
+            instruction.reg_id(r) for r in desc.get("dedicated_read_ports", []))
 
         # `None` means unrestricted
         self.write_ports = desc.get("write_ports")
-        self.dedicated_write_ports = set(desc.get("dedicated_write_ports", []))
+        self.dedicated_write_ports = frozenset(
+            instruction.reg_id(r)
+            for r in desc.get("dedicated_write_ports", []))
 
         # `self.rw_deps[instr][reg]` is the instruction from which `instr`
         # reads `reg`'s value, if that instruction is still in-flight, and
@@ -46,23 +80,49 @@ class Preemptive(interfaces.Scoreboard):
         # just before `instr` writes to it.
         self.ww_deps = {}
 
+        # Reverse indices of `self.rw_deps` and `self.ww_deps`:
+        # `self.rw_dependents[instr][reg]` is the set of instructions `i` such
+        # that `self.rw_deps[i][reg]` is `instr` (similarly for
+        # `self.ww_dependents`).
+        self.rw_dependents = {}
+        self.ww_dependents = {}
+
         # `self.wr_deps[instr][reg]` is the set of instructions that must do
         # their reads from `reg` before `instr` does its write to `reg`.
         self.wr_deps = collections.defaultdict(dict)
 
         # `self.writes[reg]` is the last instruction, so far, that intends to
-        # write to `reg`, if that instruction is in-flight, and `None`
-        # otherwise.
-        self.writes = collections.defaultdict(lambda: None)
+        # write to `reg`, if that instruction is in-flight. Otherwise `reg` is
+        # not in `self.writes`.
+        self.writes = {}
 
         # `self.reads[reg]` is the set of instructions that follow
-        # `self.writes[reg]`, and read from `reg`.
-        self.reads = collections.defaultdict(set)
+        # `self.writes[reg]`, and read from `reg`. Registers without such
+        # instructions are not in `self.reads`.
+        self.reads = {}
 
         # The set of instructions that have been issued to a functional unit.
-        # This is a coarse way of preventing deadlocks.
+        # This is a coarse way of preventing deadlocks. Only used for `dump`,
+        # the hot paths test `Instruction.issued` instead.
         self.issued = set()
 
+        # `self.unresolved_rw[instr]` is the number of (non-None) deps in
+        # `self.rw_deps[instr]` that have not been issued yet (similarly for
+        # `self.unresolved_ww` and `self.unresolved_wr`). Missing means 0.
+        self.unresolved_rw = {}
+        self.unresolved_ww = {}
+        self.unresolved_wr = {}
+
+        # `self.unwritten_rw[instr]` is the number of (non-None) deps in
+        # `self.rw_deps[instr]`. Missing means 0, in which case `can_read` only
+        # needs to check the ports.
+        self.unwritten_rw = {}
+
+        # `self.wr_dependents[instr]` is a list of the instructions `i` such
+        # that `instr` is in `self.wr_deps[i][reg]` for some `reg`, with an
+        # entry for each such `reg`. Only kept until `instr` is issued.
+        self.wr_dependents = {}
+
         # `self.write_buff[instr]` is the set of registers for which `instr`
         # has already computed a write value that can be used in a bypass.
         self.write_buff = collections.defaultdict(set)
@@ -71,13 +131,31 @@ class Preemptive(interfaces.Scoreboard):
         self.used_read_ports = 0
         self.used_write_ports = 0
 
+        # `(instr, regs, res)` where `res` is the result of the last call to
+        # `read_port_regs(instr, regs)` (similarly for `write_port_regs`).
+        # `can_read` is always followed by `read` with the same arguments (and
+        # similarly for `can_write` and `write`), so we don't need more than
+        # one entry.
+        self._read_port_regs_memo = None
+        self._write_port_regs_memo = None
+
+    def reg_name(self, reg: int) -> str:
+        """The name of a register, as used in the tracked accesses."""
+        return instruction.reg_name(reg)
+
     def dump(self, file=sys.stdout) -> None:
         print(f"-- Scoreboard {self.name}: --", file=file)
 
         print(f"read ports: {self.read_ports}", file=file)
-        print(f"dedicated read ports: {self.dedicated_read_ports}", file=file)
+        print("dedicated read ports: " +
+              ", ".join(instruction.reg_name(r)
+                        for r in self.dedicated_read_ports),
+              file=file)
         print(f"write ports: {self.write_ports}", file=file)
-        print(f"dedicated write ports: {self.dedicated_write_ports}", file=file)
+        print("dedicated write ports: " +
+              ", ".join(instruction.reg_name(r)
+                        for r in self.dedicated_write_ports),
+              file=file)
 
         print(f"issued instructions: {', '.join(str(i) for i in self.issued)}",
               file=file)
@@ -96,17 +174,19 @@ class Preemptive(interfaces.Scoreboard):
 
         for i, deps in self.rw_deps.items():
             print(f"rw {pp_instr(i)}: " +
-                  ", ".join(f"({r}: {pp_instr(d)})" for r, d in deps.items()),
+                  ", ".join(f"({self.reg_name(r)}: {pp_instr(d)})"
+                            for r, d in deps.items()),
                   file=file)
 
         for i, deps in self.ww_deps.items():
             print(f"ww {pp_instr(i)}: " +
-                  ", ".join(f"({r}: {pp_instr(d)})" for r, d in deps.items()),
+                  ", ".join(f"({self.reg_name(r)}: {pp_instr(d)})"
+                            for r, d in deps.items()),
                   file=file)
 
         for i, deps in self.wr_deps.items():
             print(f"wr {pp_instr(i)}: " +
-                  ", ".join(f"({r}: " + "; ".join(pp_instr(d)
+                  ", ".join(f"({self.reg_name(r)}: " + "; ".join(pp_instr(d)
                                                   for d in ds) + ")"
                             for r, ds in deps.items()),
                   file=file)
@@ -114,29 +194,65 @@ class Preemptive(interfaces.Scoreboard):
     # Implements interfaces.Scoreboard
     def insert_accesses(self, instr: Instruction, *,
                         # keyword-only args:
-                        reg_reads: Sequence[str],
-                        reg_writes: Sequence[str]) -> None:
+                        reg_reads: Iterable[int],
+                        reg_writes: Iterable[int]) -> None:
+        # Each instruction is inserted once, so its dicts in `self.rw_deps`,
+        # `self.ww_deps` and `self.wr_deps` are built locally and stored once.
+        rw_deps = {}
         for reg in reg_reads:
             # We assume instructions never read their own writes
-            assert self.writes[reg] != instr
-
-            self.rw_deps.setdefault(
-                instr, {}
-            )[reg] = self.writes[reg]
-            self.reads[reg].add(instr)
-
+            assert self.writes.get(reg) != instr
+
+            dep = self.writes.get(reg)
+            rw_deps[reg] = dep
+            if dep is not None:
+                self.rw_dependents.setdefault(dep, {}).setdefault(
+                    reg, set()).add(instr)
+                self.unwritten_rw[instr] = self.unwritten_rw.get(instr, 0) + 1
+                if not dep.issued:
+                    self.unresolved_rw[instr] = (
+                        self.unresolved_rw.get(instr, 0) + 1)
+            reads = self.reads.get(reg)
+            if reads is None:
+                reads = self.reads[reg] = set()
+            reads.add(instr)
+
+        if rw_deps:
+            self.rw_deps[instr] = rw_deps
+
+        ww_deps = {}
+        wr_deps = {}
         for reg in reg_writes:
             # Can instructions write twice to the same reg?
-            assert self.writes[reg] != instr
-
-            self.ww_deps.setdefault(
-                instr, {}
-            )[reg] = self.writes[reg]
-            self.wr_deps.setdefault(instr, {}).setdefault(
-                reg, set()).update(self.reads[reg] - {instr})
+            assert self.writes.get(reg) != instr
+
+            dep = self.writes.get(reg)
+            ww_deps[reg] = dep
+            if dep is not None:
+                self.ww_dependents.setdefault(dep, {}).setdefault(
+                    reg, set()).add(instr)
+                if not dep.issued:
+                    self.unresolved_ww[instr] = (
+                        self.unresolved_ww.get(instr, 0) + 1)
+
+            readers = self.reads.pop(reg, set())
+            readers.discard(instr)
+            deps = wr_deps.setdefault(reg, set())
+            for d in readers - deps:
+                if not d.issued:
+                    self.wr_dependents.setdefault(d, []).append(instr)
+                    self.unresolved_wr[instr] = (
+                        self.unresolved_wr.get(instr, 0) + 1)
+            deps.update(readers)
 
             self.writes[reg] = instr
-            self.reads[reg].clear()
+
+        if ww_deps:
+            self.ww_deps[instr] = ww_deps
+            self.wr_deps[instr] = wr_deps
+
+        if rw_deps or ww_deps:
+            instr.scoreboards_mask |= self.bit
 
     def read_port_regs(self, instr, regs):
         """Return the regs that need to use a non-dedicated read port."""
@@ -150,20 +266,32 @@ class Preemptive(interfaces.Scoreboard):
              and self.rw_deps[instr][r] is None)
         ]
 
+    def memo_read_port_regs(self, instr, regs):
+        """Same as `read_port_regs`, but reuse the last result if possible."""
+        memo = self._read_port_regs_memo
+        if memo is None or memo[0] is not instr or memo[1] is not regs:
+            memo = (instr, regs, self.read_port_regs(instr, regs))
+            self._read_port_regs_memo = memo
+        return memo[2]
+
     def check_read_ports(self, instr, regs) -> bool:
         if self.read_ports is None:
             return True
 
-        return (self.used_read_ports + len(self.read_port_regs(instr, regs)) <=
-                self.read_ports)
+        return (self.used_read_ports +
+                len(self.memo_read_port_regs(instr, regs)) <= self.read_ports)
 
     # Implements interfaces.Scoreboard
     def can_read(self, instr, regs) -> bool:
         if not self.check_read_ports(instr, regs):
             return False
 
+        if instr not in self.unwritten_rw:
+            return True
+
+        rw_deps = self.rw_deps[instr]
         for reg in regs:
-            dep = self.rw_deps[instr][reg]
+            dep = rw_deps[reg]
             if dep and reg not in self.write_buff[dep]:
                 return False
         return True
@@ -174,12 +302,20 @@ class Preemptive(interfaces.Scoreboard):
         del instr
         return [r for r in regs if r not in self.dedicated_write_ports]
 
+    def memo_write_port_regs(self, instr, regs):
+        """Same as `write_port_regs`, but reuse the last result if possible."""
+        memo = self._write_port_regs_memo
+        if memo is None or memo[0] is not instr or memo[1] is not regs:
+            memo = (instr, regs, self.write_port_regs(instr, regs))
+            self._write_port_regs_memo = memo
+        return memo[2]
+
     def check_write_ports(self, instr, regs) -> bool:
         if self.write_ports is None:
             return True
 
-        return (self.used_write_ports + len(self.write_port_regs(instr, regs))
-                <= self.write_ports)
+        return (self.used_write_ports +
+                len(self.memo_write_port_regs(instr, regs)) <= self.write_ports)
 
     # Implements interfaces.Scoreboard
     def can_write(self, instr, regs) -> bool:
@@ -190,11 +326,15 @@ class Preemptive(interfaces.Scoreboard):
                     any(self.wr_deps[instr][reg] for reg in regs))
 
     def update_used_read_ports(self, instr, regs) -> None:
-        self.used_read_ports += len(self.read_port_regs(instr, regs))
+        self.used_read_ports += len(self.memo_read_port_regs(instr, regs))
 
     # Implements interfaces.Scoreboard
     def read(self, instr, regs) -> None:
-        self.update_used_read_ports(instr, regs)
+        # The used ports are only checked when the number of ports is
+        # restricted.
+        if self.read_ports is not None:
+            self.update_used_read_ports(instr, regs)
+        self._read_port_regs_memo = None
 
         for reg in regs:
             # TODO(sflur): In RVV vec reg groups must be a multiple of the
@@ -204,84 +344,119 @@ class Preemptive(interfaces.Scoreboard):
             # allowed, consider a valid instruction like `vadd.vv v0, v1, v2`
             # with LMUL=2, and 2 slices uArch. Slice v2.0 is read twice, first
             # as part of the group starting from v2, and second as part of the
-            # group starting from v1. The `del` below will be executed for the
+            # group starting from v1. The `pop` below will be executed for the
             # first read and then the second read will fail in `can_read` where
             # we assume it's still in the map.
-            del self.rw_deps[instr][reg]
+            if self.rw_deps[instr].pop(reg) is not None:
+                self._resolve(self.unwritten_rw, instr)
 
             for rdeps in self.wr_deps.values():
                 rdeps.get(reg, set()).discard(instr)
 
-            self.reads[reg].discard(instr)
+            reads = self.reads.get(reg)
+            if reads is not None:
+                reads.discard(instr)
+                if not reads:
+                    del self.reads[reg]
 
-        if not any(self.rw_deps[instr]):
+        if not self.rw_deps[instr]:
             del self.rw_deps[instr]
             if instr not in self.ww_deps:
-                self.issued.remove(instr)
+                self.issued.discard(instr)
+                instr.scoreboards_mask &= ~self.bit
 
     # Implements interfaces.Scoreboard
     def buff_write(self, instr, regs) -> None:
         self.write_buff[instr].update(regs)
 
     def update_used_write_ports(self, instr, regs) -> None:
-        self.used_write_ports += len(self.write_port_regs(instr, regs))
+        self.used_write_ports += len(self.memo_write_port_regs(instr, regs))
 
     # Implements interfaces.Scoreboard
     def write(self, instr, regs) -> None:
-        self.update_used_write_ports(instr, regs)
+        # The used ports are only checked when the number of ports is
+        # restricted.
+        if self.write_ports is not None:
+            self.update_used_write_ports(instr, regs)
+        self._write_port_regs_memo = None
+        # The write below might change the result of `read_port_regs`.
+        self._read_port_regs_memo = None
+
+        rw_dependents = self.rw_dependents.get(instr, {})
+        ww_dependents = self.ww_dependents.get(instr, {})
 
         for reg in regs:
             del self.ww_deps[instr][reg]
             del self.wr_deps[instr][reg]
 
-            for rdeps in self.rw_deps.values():
-                if rdeps.get(reg) == instr:
+            # Instructions that already did their read of `reg` are no longer
+            # in `self.rw_deps`, or no longer have `reg` there.
+            for i in rw_dependents.pop(reg, ()):
+                rdeps = self.rw_deps.get(i)
+                if rdeps is not None and rdeps.get(reg) is instr:
                     rdeps[reg] = None
+                    self._resolve(self.unwritten_rw, i)
 
-            for rdeps in self.ww_deps.values():
-                if rdeps.get(reg) == instr:
-                    rdeps[reg] = None
+            for i in ww_dependents.pop(reg, ()):
+                self.ww_deps[i][reg] = None
+
+            if self.writes.get(reg) is instr:
+                del self.writes[reg]
 
-            if self.writes[reg] == instr:
-                self.writes[reg] = None
+        if not rw_dependents:
+            self.rw_dependents.pop(instr, None)
+        if not ww_dependents:
+            self.ww_dependents.pop(instr, None)
 
-        if not any(self.ww_deps[instr]):
+        if not self.ww_deps[instr]:
             del self.ww_deps[instr]
             del self.wr_deps[instr]
             if instr not in self.rw_deps:
-                self.issued.remove(instr)
+                self.issued.discard(instr)
+                instr.scoreboards_mask &= ~self.bit
 
         self.write_buff.pop(instr, None)
 
     # Implements interfaces.Scoreboard
     def can_issue(self, instr) -> bool:
-        if (instr not in self.rw_deps and instr not in self.ww_deps and
-                instr not in self.wr_deps):
+        if not instr.scoreboards_mask & self.bit:
             return True
 
-        if any(d and d not in self.issued
-               for d in self.rw_deps.get(instr, {}).values()):
-            return False
-
-        if any(d and d not in self.issued
-               for d in self.ww_deps.get(instr, {}).values()):
-            return False
-
-        if any(d not in self.issued
-               for ds in self.wr_deps.get(instr, {}).values()
-               for d in ds):
-            return False
-
-        return True
+        return (instr not in self.unresolved_rw and
+                instr not in self.unresolved_ww and
+                instr not in self.unresolved_wr)
 
     # Implements interfaces.Scoreboard
     def issue(self, instr) -> None:
-        if (instr not in self.rw_deps and instr not in self.ww_deps and
-                instr not in self.wr_deps):
+        instr.issued = True
+
+        if not instr.scoreboards_mask & self.bit:
             return
 
         self.issued.add(instr)
 
+        # Any instruction that depends on `instr` was inserted before `instr`
+        # was issued, and hence counted it as unresolved.
+        for ds in self.rw_dependents.get(instr, {}).values():
+            for d in ds:
+                self._resolve(self.unresolved_rw, d)
+
+        for ds in self.ww_dependents.get(instr, {}).values():
+            for d in ds:
+                self._resolve(self.unresolved_ww, d)
+
+        for d in self.wr_dependents.pop(instr, ()):
+            self._resolve(self.unresolved_wr, d)
+
+    @staticmethod
+    def _resolve(unresolved, instr) -> None:
+        """Decrement `unresolved[instr]`, removing it when it reaches 0."""
+        n = unresolved[instr] - 1
+        if n:
+            unresolved[instr] = n
+        else:
+            del unresolved[instr]
+
     def clear_used_ports(self) -> None:
         self.used_read_ports = 0
         self.used_write_ports = 0
@@ -325,32 +500,42 @@ class Preemptive(interfaces.Scoreboard):
 class VecPreemptive(Preemptive):
     """Scoreboard for vector registers.
 
-    Each register is sliced to multiple slices.
+    Each register is sliced to multiple slices. The accessed registers are
+    slice IDs (see `slice_id`).
     """
 
+    __slots__ = ("slices",)
+
     def __init__(self, uid: str, desc: Dict[str, Any], slices: int) -> None:
         super().__init__(uid, desc)
 
+        # Slice indices must fit in the SLICE_BITS of `slice_id`.
+        assert slices <= 1 << SLICE_BITS
+
         self.slices = slices
 
         self.used_read_ports = [0] * slices
         self.used_write_ports = [0] * slices
 
-    def read_port_regs(self, instr,
-                       regs: Sequence[str]) -> Dict[int, Sequence[str]]:
-        """Return the regs that need to use a non-dedicated read port."""
+    def reg_name(self, reg: int) -> str:
+        return f"{instruction.reg_name(reg >> SLICE_BITS)}.{reg & SLICE_MASK}"
+
+    def read_port_regs(self, instr, regs: Sequence[int]) -> Dict[int, int]:
+        """Return the number of regs, per slice, that need to use a
+        non-dedicated read port."""
 
         res = {}
 
         for rs in regs:
-            r, _, s = rs.rpartition(".")
+            r = rs >> SLICE_BITS
             if (r not in self.dedicated_read_ports
                     # rw_deps which are not None will be read from
                     # the write-buffer.
                     # TODO(sflur): what are the restrictions on the
                     # write-buffer?
                     and self.rw_deps[instr][rs] is None):
-                res.setdefault(int(s), collections.deque()).append(r)
+                s = rs & SLICE_MASK
+                res[s] = res.get(s, 0) + 1
 
         return res
 
@@ -358,21 +543,22 @@ class VecPreemptive(Preemptive):
         if self.read_ports is None:
             return True
 
-        regs = self.read_port_regs(instr, regs)
+        counts = self.memo_read_port_regs(instr, regs)
 
-        return all(self.used_read_ports[s] + len(rs) <= self.read_ports
-                   for s, rs in regs.items())
+        return all(self.used_read_ports[s] + n <= self.read_ports
+                   for s, n in counts.items())
 
     def write_port_regs(self, instr: Instruction,
-                        regs: Sequence[str]) -> Dict[int, Sequence[str]]:
-        """Return the regs that need to use a non-dedicated write port."""
+                        regs: Sequence[int]) -> Dict[int, int]:
+        """Return the number of regs, per slice, that need to use a
+        non-dedicated write port."""
 
         res = {}
 
         for rs in regs:
-            r, _, s = rs.rpartition(".")
-            if r not in self.dedicated_write_ports:
-                res.setdefault(int(s), collections.deque()).append(r)
+            if rs >> SLICE_BITS not in self.dedicated_write_ports:
+                s = rs & SLICE_MASK
+                res[s] = res.get(s, 0) + 1
 
         return res
 
@@ -380,20 +566,19 @@ class VecPreemptive(Preemptive):
         if self.write_ports is None:
             return True
 
-        regs = self.write_port_regs(instr, regs)
+        counts = self.memo_write_port_regs(instr, regs)
 
-        return all(self.used_write_ports[s] + len(rs) <= self.write_ports
-                   for s, rs in regs.items())
+        return all(self.used_write_ports[s] + n <= self.write_ports
+                   for s, n in counts.items())
 
     def update_used_read_ports(self, instr, regs) -> None:
-        for s, rs in self.read_port_regs(instr, regs).items():
-            self.used_read_ports[s] += len(rs)
+        for s, n in self.memo_read_port_regs(instr, regs).items():
+            self.used_read_ports[s] += n
 
     def update_used_write_ports(self, instr, regs) -> None:
-        for s, rs in self.write_port_regs(instr, regs).items():
-            self.used_write_ports[s] += len(rs)
+        for s, n in self.memo_write_port_regs(instr, regs).items():
+            self.used_write_ports[s] += n
 
     def clear_used_ports(self) -> None:
-        for s in range(self.slices):
-            self.used_read_ports[s] = 0
-            self.used_write_ports[s] = 0
+        self.used_read_ports = [0] * self.slices
+        self.used_write_ports = [0] * self.slices
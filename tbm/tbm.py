@@ -20,6 +20,7 @@ Models the microarchitectural behavior of a processor
 based on a trace obtained from a functional simulator.
 """
 
+import functools
 import json
 import logging
 from typing import Any, Dict, Sequence
@@ -41,6 +42,8 @@ from vector_pipe import VectorPipe
 logger = logging.getLogger("tbm")
 
 
+# The schema file doesn't change, so it is read and checked only once.
+@functools.lru_cache(maxsize=None)
 def schema_validator() -> jsonschema.protocols.Validator:
     # TODO(b/261619078): use importlib instead of relative path
     schema_file_name = "config/uarch.schema.json"
@@ -79,7 +82,7 @@ def validate_uarch(validator: jsonschema.protocols.Validator,
 def load_config_file(name: str) -> Dict[str, Any]:
     with open(name, "r", encoding="ascii") as file:
         if name.endswith(".json"):
-            return json.load(file)
+            return utilities.json_loads(file.read())
 
         if not name.endswith(".yaml"):
             logger.warning("The file '%s' has an unrecognized suffix (expected"
@@ -189,16 +192,17 @@ def merge_config(uarch: Dict[str, Any],
 
 
 def remove_comments(desc: Dict[str, Any]) -> None:
-    comments = [
-        k for k in desc if k == "description" or k.startswith("__comment__")
-    ]
+    stack = [desc]
+    while stack:
+        d = stack.pop()
+        comments = [
+            k for k in d if k == "description" or k.startswith("__comment__")
+        ]
 
-    for k in comments:
-        del desc[k]
+        for k in comments:
+            del d[k]
 
-    for _, val in desc.items():
-        if isinstance(val, dict):
-            remove_comments(val)
+        stack.extend(val for val in d.values() if isinstance(val, dict))
 
 
 def create_scoreboard(uid: str, desc: Dict[str, Any],
@@ -220,7 +224,7 @@ def create_cpu(uarch_desc: Dict[str, Any], in_trace: FunctionalTrace) -> CPU:
     pipe_map_keys = pipe_map.keys()  # This is a dynamic view
     for pm_file in uarch_desc["pipe_maps"]:
         with open(pm_file, "r", encoding="ascii") as pm_io:
-            pm = json.load(pm_io)
+            pm = utilities.json_loads(pm_io.read())
 
         pm.pop("__comment__", None)
 
@@ -15,11 +15,21 @@
 """ Store command-line options for global access. """
 
 import argparse
-from typing import Sequence
+from typing import Optional, Sequence, Tuple
 
 args = None
 
 
+def instructions_range(arg: str) -> Tuple[int, Optional[int]]:
+    """Parse "N:[M]" to `(N, M)`, where M is None if omitted."""
+    start, _, end = arg.partition(":")
+    try:
+        return (int(start), int(end) if end else None)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(
+            f"expected N:[M], got '{arg}'") from e
+
+
 def parse_args(argv: Sequence[str], description: str) -> None:
     parser = argparse.ArgumentParser(
         description=description,
@@ -84,6 +94,7 @@ def parse_args(argv: Sequence[str], description: str) -> None:
 
     parser.add_argument("--instructions",
                         default="0:",
+                        type=instructions_range,
                         help="Restrict the run to the instructions between N"
                         " and M",
                         metavar="N:[M]")
@@ -16,11 +16,20 @@
 
 import enum
 import itertools
+import json
 import logging
 import sys
 import threading
 import time
-from typing import Any, Callable, Iterable, Sequence
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+try:
+    # orjson is optional (see README.md), it parses JSON several times faster
+    # than json.
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
 
 
 def logging_config(level: int) -> None:
@@ -46,6 +55,12 @@ def logging_config(level: int) -> None:
     logging.basicConfig(handlers=[stdout_h, stderr_h],
                         level=level)
 
+    # The format above doesn't use thread or process information, so don't
+    # collect it for each record.
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
 
 class FileFormat(enum.Enum):
     FLATBUFFERS = enum.auto()
@@ -53,7 +68,12 @@ class FileFormat(enum.Enum):
 
 
 def flatten(xss: Iterable[Iterable[Any]]) -> Sequence[Any]:
-    return list(itertools.chain.from_iterable(xss))
+    return list(flatten_iter(xss))
+
+
+def flatten_iter(xss: Iterable[Iterable[Any]]) -> Iterator[Any]:
+    """Same as `flatten`, but returns an iterator instead of a list."""
+    return itertools.chain.from_iterable(xss)
 
 
 class CallEvery():
@@ -63,29 +83,29 @@ class CallEvery():
     the with block.
     """
 
+    __slots__ = ("period", "f", "_stop", "_thread")
+
     def __init__(self, period, f: Callable[[], None]):
         self.period = period
         self.f = f
-        self.running = False
-        self.timer = None
-        self.t = None
+        self._stop = threading.Event()
+        self._thread = None
 
     def __enter__(self) -> None:
-        self.running = True
-        self.t = time.time() + self.period
-        self.timer = threading.Timer(max(self.t - time.time(), 0), self._run)
-        self.timer.start()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
 
     def __exit__(self, exc_type, exc_value, traceback) -> bool:
-        self.running = False
-        if self.timer:
-            self.timer.cancel()
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
         return False
 
-    def _run(self):
-        if self.running:
+    def _loop(self) -> None:
+        t = time.time() + self.period
+        # `wait` returns True once `__exit__` sets `_stop`.
+        while not self._stop.wait(max(t - time.time(), 0)):
             self.f()
-            self.t += self.period
-            self.timer = threading.Timer(max(self.t - time.time(), 0),
-                                         self._run)
-            self.timer.start()
+            t += self.period
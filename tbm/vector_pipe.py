@@ -46,6 +46,15 @@ class VectorPipe(interfaces.ExecPipeline):
     cycle of the last slice).
     """
 
+    __slots__ = ("_eiq", "_can_skip_eiq", "_slices", "_pipelined", "_stage",
+                 "_occupied_stages", "_inflight_instr", "_inflight_next_slice",
+                 "is_ready", "_writebackq", "_mem", "_load_stage",
+                 "_fixed_load_latency", "_load_reply_stage",
+                 "_stalling_loads", "_store_stage", "_fixed_store_latency",
+                 "_store_reply_stage", "_stalling_stores", "_waiting_replies",
+                 "_rf_scoreboards", "_vec_reg_seq_memo", "_util_eiq",
+                 "_util_pipe", "_util_wbq")
+
     def __init__(self, name: str, kind: str, desc: Dict[str, Any], slices: int,
                  mem_sys,
                  rf_scoreboards: Dict[str, Union[scoreboard.Preemptive,
@@ -61,8 +70,13 @@ class VectorPipe(interfaces.ExecPipeline):
         self._slices = slices
         self._pipelined = desc["pipelined"]
         self._stage = collections.deque([None] * self.depth)
+        # The number of stages that are not None.
+        self._occupied_stages = 0
         self._inflight_instr = None
         self._inflight_next_slice = 0
+        # See ScalarPipe.
+        self.is_ready = (self._is_ready_pipelined if self._pipelined
+                         else self._is_ready_not_pipelined)
 
         # The writeback buffer
         self._writebackq = BufferedQueue(desc.get("writeback_buff_size"))
@@ -73,17 +87,43 @@ class VectorPipe(interfaces.ExecPipeline):
 
         self._load_stage = desc.get("load_stage")
         self._fixed_load_latency = desc.get("fixed_load_latency")
+        # The stage at which a load waits for its reply.
+        self._load_reply_stage = (
+            self._load_stage + self._fixed_load_latency
+            if self._load_stage is not None else None)
+        # Same as in ScalarPipe. As each slice does at most one load, the stage
+        # entry, `(instr, s)`, is used as the key.
         self._stalling_loads = {}
 
         self._store_stage = desc.get("store_stage")
         self._fixed_store_latency = desc.get("fixed_store_latency")
+        # The stage at which a store waits for its reply.
+        self._store_reply_stage = (
+            self._store_stage + self._fixed_store_latency
+            if self._store_stage is not None else None)
+        # Same as _stalling_loads, for stores.
         self._stalling_stores = {}
+        # The number of True values in _stalling_loads and _stalling_stores.
+        self._waiting_replies = 0
 
         self._rf_scoreboards = rf_scoreboards
 
+        # Memoized results of `vec_reg_seq`, which depend only on its
+        # arguments.
+        self._vec_reg_seq_memo = {}
+
+        # `cntr.utilizations[f"{self.name}.*"]`, set by `reset`.
+        self._util_eiq = None
+        self._util_pipe = None
+        self._util_wbq = None
+
     def eslices(self, instr: Instruction) -> int:
         """The number of slices required to execute `instr`."""
-        return math.ceil(instr.max_emul() * self._slices)
+        eslices = instr.eslices_cache
+        if eslices is None:
+            eslices = math.ceil(instr.max_emul() * self._slices)
+            instr.eslices_cache = eslices
+        return eslices
 
     def slice(self, accesses: Sequence[int], index: int,
               eslices: int) -> Tuple[int, int]:
@@ -105,115 +145,160 @@ class VectorPipe(interfaces.ExecPipeline):
         slen = min(slen, alen - start)
         return (accesses[start], slen)
 
+    def load_slices(self, instr: Instruction) -> Sequence[Tuple[int, int]]:
+        """For each slice of `instr`, the `slice` of `instr.loads`.
+
+        The result is cached in `instr`.
+        """
+        res = instr.load_slices_cache
+        if res is None:
+            eslices = self.eslices(instr)
+            res = tuple(self.slice(instr.loads, s, eslices)
+                        for s in range(eslices))
+            instr.load_slices_cache = res
+        return res
+
+    def store_slices(self, instr: Instruction) -> Sequence[Tuple[int, int]]:
+        """Same as `load_slices`, for `instr.stores`."""
+        res = instr.store_slices_cache
+        if res is None:
+            eslices = self.eslices(instr)
+            res = tuple(self.slice(instr.stores, s, eslices)
+                        for s in range(eslices))
+            instr.store_slices_cache = res
+        return res
+
+    def slice_reads(
+            self, instr: Instruction
+    ) -> Sequence[Sequence[Tuple[str, Sequence[int]]]]:
+        """For each slice of `instr`, the `(rf, regs)` pairs of the registers
+        the slice reads (see `input_seq_by_type`).
+
+        The result is cached in `instr`.
+        """
+        res = instr.slice_reads_cache
+        if res is None:
+            inputs = self.input_seq_by_type(instr).items()
+            res = tuple(tuple((rf, seq[s]) for rf, seq in inputs)
+                        for s in range(self.eslices(instr)))
+            instr.slice_reads_cache = res
+        return res
+
+    def slice_writes(
+            self, instr: Instruction
+    ) -> Sequence[Sequence[Tuple[str, Sequence[int]]]]:
+        """Same as `slice_reads`, for the registers the slices write (see
+        `output_seq_by_type`)."""
+        res = instr.slice_writes_cache
+        if res is None:
+            outputs = self.output_seq_by_type(instr).items()
+            res = tuple(tuple((rf, seq[s]) for rf, seq in outputs)
+                        for s in range(self.eslices(instr)))
+            instr.slice_writes_cache = res
+        return res
+
     def reg_read_stall(self, instr: Instruction, s: int) -> bool:
-        return any(not self._rf_scoreboards[rf].can_read(instr, seq[s])
-                   for rf, seq in self.input_seq_by_type(instr).items()
-                   if len(seq) > s)
+        sbs = self._rf_scoreboards
+        for rf, regs in self.slice_reads(instr)[s]:
+            if not sbs[rf].can_read(instr, regs):
+                return True
+        return False
 
     def reg_write_stall(self, instr: Instruction, s: int) -> bool:
-        return any(not self._rf_scoreboards[rf].can_write(instr, seq[s])
-                   for rf, seq in self.output_seq_by_type(instr).items()
-                   if len(seq) > s)
+        sbs = self._rf_scoreboards
+        for rf, regs in self.slice_writes(instr)[s]:
+            if not sbs[rf].can_write(instr, regs):
+                return True
+        return False
 
     def sb_reg_read(self, instr: Instruction, s: int) -> None:
-        for rf, seq in self.input_seq_by_type(instr).items():
-            if len(seq) > s and seq[s]:
-                self._rf_scoreboards[rf].read(instr, seq[s])
+        sbs = self._rf_scoreboards
+        for rf, regs in self.slice_reads(instr)[s]:
+            if regs:
+                sbs[rf].read(instr, regs)
 
     def sb_buff_reg_write(self, instr: Instruction, s: int) -> None:
-        for rf, seq in self.output_seq_by_type(instr).items():
-            if len(seq) > s:
-                self._rf_scoreboards[rf].buff_write(instr, seq[s])
+        sbs = self._rf_scoreboards
+        for rf, regs in self.slice_writes(instr)[s]:
+            sbs[rf].buff_write(instr, regs)
 
     def sb_reg_write(self, instr: Instruction, s: int) -> None:
-        for rf, seq in self.output_seq_by_type(instr).items():
-            if len(seq) > s:
-                self._rf_scoreboards[rf].write(instr, seq[s])
+        sbs = self._rf_scoreboards
+        for rf, regs in self.slice_writes(instr)[s]:
+            sbs[rf].write(instr, regs)
 
     def do_reg_writeback(self) -> None:
-        if self._writebackq:
-            instr, s = self._writebackq[0]
-            if not self.reg_write_stall(instr, s):
-                self.sb_reg_write(instr, s)
-                self._writebackq.popleft()
-                if s + 1 == self.eslices(instr):
-                    self.retired_instrs.append(instr)
+        """Write back the head of the (non-empty) writeback queue, if it can."""
+        instr, s = self._writebackq[0]
+        if not self.reg_write_stall(instr, s):
+            self.sb_reg_write(instr, s)
+            self._writebackq.popleft()
+            if s + 1 == instr.eslices_cache:
+                self.retired_instrs.append(instr)
 
     def stall(self, cntr: Counter) -> bool:
         # Check if last stage needs to do reg writes, and the writeback buffer
         # is full.
-        if (self._stage[-1] and any(
-                self._stage[-1][1] < len(seq) and seq[self._stage[-1][1]]
-                for _, seq in
-                  self.output_seq_by_type(self._stage[-1][0]).items()) and
-            self._writebackq.is_buffer_full()):
+        last = self._stage[-1]
+        if (last and self._writebackq.is_buffer_full() and
+                any(regs for _, regs in self.slice_writes(last[0])[last[1]])):
             return True
 
         # Check if memory accesses are waiting for reply.
-        if (any(self._stalling_loads.values()) or
-            any(self._stalling_stores.values())):
+        if self._waiting_replies:
             cntr.vector_load_store_stall += 1
             return True
 
         return False
 
     def do_load(self) -> None:
-        if self._load_stage is None:
-            return
-
-        if (self._stage[self._load_stage] and
-            self._stage[self._load_stage][0].loads):
-            instr, s = self._stage[self._load_stage]
-            load, _size = self.slice(instr.loads, s, self.eslices(instr))
-            if (instr, s, load) not in self._stalling_loads:
-                # TODO(sflur): pass size to issue_load
-                self._mem.issue_load((instr, s), load)
-                self._stalling_loads[(instr, s, load)] = None
-
-        if (self._stage[self._load_stage + self._fixed_load_latency] and
-                self._stage[self._load_stage +
-                            self._fixed_load_latency][0].loads):
-            instr, s = self._stage[self._load_stage + self._fixed_load_latency]
-            load, _ = self.slice(instr.loads, s, self.eslices(instr))
-            if self._stalling_loads[(instr, s, load)] is None:
-                self._stalling_loads[(instr, s, load)] = True
-            for load in self._mem.take_load_replys((instr, s)):
-                self._stalling_loads[(instr, s, load)] = False
+        """Issue and wait for loads. Only for pipes with a load stage."""
+        if ((st := self._stage[self._load_stage]) and st[0].loads and
+                st not in self._stalling_loads):
+            instr, s = st
+            load, _size = self.load_slices(instr)[s]
+            # TODO(sflur): pass size to issue_load
+            self._mem.issue_load(st, load)
+            self._stalling_loads[st] = None
+
+        if (st := self._stage[self._load_reply_stage]) and st[0].loads:
+            if self._stalling_loads[st] is None:
+                self._stalling_loads[st] = True
+                self._waiting_replies += 1
+            if self._mem.take_load_replys(st):
+                if self._stalling_loads[st]:
+                    self._waiting_replies -= 1
+                self._stalling_loads[st] = False
 
     def do_store(self) -> None:
-        if self._store_stage is None:
-            return
-
-        if self._stage[self._store_stage] and self._stage[
-                self._store_stage][0].stores:
-            instr, s = self._stage[self._store_stage]
-            store, _size = self.slice(instr.stores, s, self.eslices(instr))
-            if (instr, s, store) not in self._stalling_stores:
-                # TODO(sflur): pass size to issue_store
-                self._mem.issue_store((instr, s), store)
-                self._stalling_stores[(instr, s, store)] = None
-
-        if (self._stage[self._store_stage + self._fixed_store_latency] and
-                self._stage[self._store_stage +
-                           self._fixed_store_latency][0].stores):
-            instr, s = self._stage[self._store_stage +
-                                   self._fixed_store_latency]
-            store, _ = self.slice(instr.stores, s, self.eslices(instr))
-            if self._stalling_stores[(instr, s, store)] is None:
-                self._stalling_stores[(instr, s, store)] = True
-            for store in self._mem.take_store_replys((instr, s)):
-                self._stalling_stores[(instr, s, store)] = False
+        """Issue and wait for stores. Only for pipes with a store stage."""
+        if ((st := self._stage[self._store_stage]) and st[0].stores and
+                st not in self._stalling_stores):
+            instr, s = st
+            store, _size = self.store_slices(instr)[s]
+            # TODO(sflur): pass size to issue_store
+            self._mem.issue_store(st, store)
+            self._stalling_stores[st] = None
+
+        if (st := self._stage[self._store_reply_stage]) and st[0].stores:
+            if self._stalling_stores[st] is None:
+                self._stalling_stores[st] = True
+                self._waiting_replies += 1
+            if self._mem.take_store_replys(st):
+                if self._stalling_stores[st]:
+                    self._waiting_replies -= 1
+                self._stalling_stores[st] = False
 
     # Implements interfaces.ExecPipeline
     def reset(self, cntr: Counter) -> None:
         super().reset(cntr)
         # TODO(sflur): implement proper reset
-        cntr.utilizations[f"{self.name}.eiq"] = counter.Utilization(
-            self._eiq.size)
-        cntr.utilizations[f"{self.name}.pipe"] = counter.Utilization(
-            len(self._stage))
-        cntr.utilizations[f"{self.name}.wbq"] = counter.Utilization(
-            self._writebackq.size)
+        self._util_eiq = counter.Utilization(self._eiq.size)
+        cntr.utilizations[f"{self.name}.eiq"] = self._util_eiq
+        self._util_pipe = counter.Utilization(len(self._stage))
+        cntr.utilizations[f"{self.name}.pipe"] = self._util_pipe
+        self._util_wbq = counter.Utilization(self._writebackq.size)
+        cntr.utilizations[f"{self.name}.wbq"] = self._util_wbq
 
     # Implements interfaces.ExecPipeline
     def tick(self, cntr: Counter) -> None:
@@ -221,95 +306,94 @@ class VectorPipe(interfaces.ExecPipeline):
 
         self.retired_instrs.clear()
 
-        self.do_reg_writeback()
+        # See ScalarPipe.
+        if not (self._occupied_stages or self._inflight_instr or self._eiq or
+                self._writebackq):
+            return
+
+        if self._writebackq:
+            self.do_reg_writeback()
+
+        stage = self._stage
 
         if not self.stall(cntr):
             # Cleanup self.stalling_loads
-            if (self._load_stage is not None and
-                    self._stage[self._load_stage + self._fixed_load_latency] and
-                    self._stage[self._load_stage +
-                               self._fixed_load_latency][0].loads):
-                instr, s = self._stage[self._load_stage +
-                                       self._fixed_load_latency]
-                load, _ = self.slice(instr.loads, s, self.eslices(instr))
+            if (self._load_reply_stage is not None and
+                    (st := stage[self._load_reply_stage]) and
+                    st[0].loads):
                 # The assertion holds because self.stall() above is True.
-                assert not self._stalling_loads.get((instr, s, load), False)
-                del self._stalling_loads[(instr, s, load)]
+                assert not self._stalling_loads.get(st, False)
+                del self._stalling_loads[st]
 
             # Cleanup self.stalling_stores
-            if (self._store_stage is not None and
-                    self._stage[self._store_stage +
-                                self._fixed_store_latency] and
-                    self._stage[self._store_stage +
-                               self._fixed_store_latency][0].stores):
-                instr, s = self._stage[self._store_stage +
-                                      self._fixed_store_latency]
-                store, _ = self.slice(instr.stores, s, self.eslices(instr))
+            if (self._store_reply_stage is not None and
+                    (st := stage[self._store_reply_stage]) and
+                    st[0].stores):
                 # The assertion holds because self.stall() above is True.
-                assert not self._stalling_stores.get((instr, s, store), False)
-                del self._stalling_stores[(instr, s, store)]
+                assert not self._stalling_stores.get(st, False)
+                del self._stalling_stores[st]
 
             # Shift stages
-            st = self._stage.pop()
+            st = stage.pop()
             if st:
+                self._occupied_stages -= 1
                 instr, s = st
-                if any(
-                        len(seq) > s and seq[s]
-                        for _, seq in self.output_seq_by_type(instr).items()):
+                if any(regs for _, regs in self.slice_writes(instr)[s]):
                     self._writebackq.buffer((instr, s))
-                    cntr.utilizations[f"{self.name}.wbq"].count += 1
+                    self._util_wbq.count += 1
                     self.sb_buff_reg_write(instr, s)
-                elif s + 1 == self.eslices(instr):
+                elif s + 1 == instr.eslices_cache:
                     self.retired_instrs.append(instr)
 
             # Issue the next slice into the piprline.
-            if (self._inflight_instr and not self.reg_read_stall(
-                    self._inflight_instr, self._inflight_next_slice)):
-                self.sb_reg_read(self._inflight_instr,
-                                 self._inflight_next_slice)
-
-                self._stage.appendleft(
-                    (self._inflight_instr, self._inflight_next_slice))
-                cntr.utilizations[f"{self.name}.pipe"].count += 1
-                self._inflight_next_slice += 1
-                if self._inflight_next_slice == self.eslices(
-                        self._inflight_instr):
+            inflight = self._inflight_instr
+            next_slice = self._inflight_next_slice
+            if inflight and not self.reg_read_stall(inflight, next_slice):
+                self.sb_reg_read(inflight, next_slice)
+
+                stage.appendleft((inflight, next_slice))
+                self._occupied_stages += 1
+                self._util_pipe.count += 1
+                self._inflight_next_slice = next_slice + 1
+                if next_slice + 1 == inflight.eslices_cache:
                     self._inflight_instr = None
             else:
-                self._stage.appendleft(None)
+                stage.appendleft(None)
 
-        self.do_load()
-        self.do_store()
+        if self._load_stage is not None:
+            self.do_load()
+        if self._store_stage is not None:
+            self.do_store()
 
-        # Try to issue each of the instructions in `eiq`.
+        # Try to issue each of the instructions in `eiq`, until one succeeds.
+        # See ScalarPipe.
         if self.is_ready():
-            for _ in range(len(self._eiq)):
-                instr = self._eiq.popleft()
+            eiq = self._eiq
+            for i, instr in enumerate(eiq):
                 if self.try_issue(instr, cntr):
+                    eiq.rotate(-i)
+                    eiq.popleft()
                     break
 
-                self._eiq.append(instr)
-
     # Implements interfaces.ExecPipeline
     def tock(self, cntr: Counter) -> None:
         super().tock(cntr)
 
         self.retired_instrs.clear()
 
-        cntr.utilizations[f"{self.name}.pipe"].occupied += len(
-            list(1 for i in self._stage if i))
+        self._util_pipe.occupied += self._occupied_stages
 
         self._eiq.flush()
-        cntr.utilizations[f"{self.name}.eiq"].occupied += len(self._eiq)
+        self._util_eiq.occupied += len(self._eiq)
 
         self._writebackq.flush()
-        cntr.utilizations[f"{self.name}.wbq"].occupied += len(self._writebackq)
+        self._util_wbq.occupied += len(self._writebackq)
 
     # Implements interfaces.ExecPipeline
     def pending(self) -> int:
-        eiq_count = len(list(self._eiq.chain()))
-        pipe_count = len(list(1 for i in self._stage if i))
-        wbq_count = len(list(self._writebackq.chain()))
+        eiq_count = self._eiq.buffered_len()
+        pipe_count = self._occupied_stages
+        wbq_count = self._writebackq.buffered_len()
         return eiq_count + pipe_count + wbq_count
 
     # Implements interfaces.ExecPipeline
@@ -317,45 +401,57 @@ class VectorPipe(interfaces.ExecPipeline):
         if self._eiq.is_buffer_full():
             return False
 
+        # Sets `instr.eslices_cache`, which the per-cycle code reads directly.
+        self.eslices(instr)
+
         inputs = self.input_seq_by_type(instr)
         outputs = self.output_seq_by_type(instr)
 
-        for rf in inputs.keys() | outputs.keys():
-            reads = utilities.flatten(inputs.get(rf, []))
-            writes = utilities.flatten(outputs.get(rf, []))
-            self._rf_scoreboards[rf].insert_accesses(instr, reg_reads=reads,
-                                                     reg_writes=writes)
+        for rf, seq in inputs.items():
+            self._rf_scoreboards[rf].insert_accesses(
+                instr, reg_reads=utilities.flatten_iter(seq),
+                reg_writes=utilities.flatten_iter(outputs.get(rf, ())))
+        for rf, seq in outputs.items():
+            if rf not in inputs:
+                self._rf_scoreboards[rf].insert_accesses(
+                    instr, reg_reads=(),
+                    reg_writes=utilities.flatten_iter(seq))
 
         if not (self._can_skip_eiq and self.is_ready() and
                 self.try_issue(instr, cntr)):
             self._eiq.buffer(instr)
-            cntr.utilizations[f"{self.name}.eiq"].count += 1
+            self._util_eiq.count += 1
 
         if instr.loads or instr.stores:
             cntr.vector_load_store += 1
 
         return True
 
-    def is_ready(self) -> bool:
-        """Check if the pipe is ready to accept a new instruction."""
-        if self._pipelined:
-            return self._inflight_instr is None and self._stage[0] is None
+    def _is_ready_pipelined(self) -> bool:
+        """Check if the (pipelined) pipe can accept a new instruction."""
+        return self._inflight_instr is None and self._stage[0] is None
 
-        return self._inflight_instr is None and all(
-            s is None for s in self._stage)
+    def _is_ready_not_pipelined(self) -> bool:
+        """Check if the (not pipelined) pipe can accept a new instruction."""
+        return self._inflight_instr is None and not self._occupied_stages
 
     def try_issue(self, instr: Instruction, cntr: Counter) -> bool:
         """Issue an instruction."""
 
-        if not all(sb.can_issue(instr) for sb in self._rf_scoreboards.values()):
-            return False
+        # An instruction that no scoreboard tracks (see
+        # `Instruction.scoreboards_mask`) has no register accesses to check.
+        if instr.scoreboards_mask:
+            if not all(sb.can_issue(instr)
+                       for sb in self._rf_scoreboards.values()):
+                return False
 
-        if self.reg_read_stall(instr, 0):
-            return False
+            if self.reg_read_stall(instr, 0):
+                return False
 
         assert self._stage[0] is None
         self._stage[0] = (instr, 0)
-        cntr.utilizations[f"{self.name}.pipe"].count += 1
+        self._occupied_stages += 1
+        self._util_pipe.count += 1
 
         assert self._inflight_instr is None
         if 1 < self.eslices(instr):
@@ -370,14 +466,33 @@ class VectorPipe(interfaces.ExecPipeline):
         return True
 
     def vec_reg_seq(self, reg: str, input_reg: bool, emul: Union[int, float],
-                    max_emul: Union[int, float]) -> Sequence[Optional[str]]:
+                    max_emul: Union[int, float]) -> Sequence[Optional[int]]:
+        """The slice IDs (see `scoreboard.slice_id`) accessed by each slice of
+        the instruction, for the vector register group starting at `reg`.
+
+        The result is shared between calls, and must not be modified.
+        """
+        key = (reg, input_reg, emul, max_emul)
+        seq = self._vec_reg_seq_memo.get(key)
+        if seq is None:
+            seq = self._vec_reg_seq(reg, input_reg, emul, max_emul)
+            self._vec_reg_seq_memo[key] = seq
+        return seq
+
+    def _vec_reg_seq(self, reg: str, input_reg: bool, emul: Union[int, float],
+                     max_emul: Union[int, float]) -> Sequence[Optional[int]]:
+        """`vec_reg_seq` without the memoization."""
         base = int(reg[1:])
         if emul < 1:
-            seq = [f"{reg}.{s}" for s in range(math.ceil(emul * self._slices))]
+            rid = instruction.reg_id(reg)
+            seq = [scoreboard.slice_id(rid, s)
+                   for s in range(math.ceil(emul * self._slices))]
         else:
             emul = int(emul)
             seq = [
-                f"{reg[0]}{base + g}.{s}" for g in range(emul)
+                scoreboard.slice_id(instruction.reg_id(f"{reg[0]}{base + g}"),
+                                    s)
+                for g in range(emul)
                 for s in range(self._slices)
             ]
 
@@ -393,53 +508,60 @@ class VectorPipe(interfaces.ExecPipeline):
             seq = zip([None] * len(seq), seq)
         return utilities.flatten(seq)
 
-    def input_seq(self, instr: Instruction, reg: str) -> Sequence[str]:
-        if instruction.is_vector_register(reg):
+    def input_seq(self, instr: Instruction, reg: int) -> Sequence[int]:
+        name = instruction.reg_name(reg)
+        if instruction.is_vector_register(name):
             assert instr.lmul is not None
 
             # TODO(sflur): anymore cases of input widening?
             if ((instr.mnemonic.endswith(".wv") or
                  instr.mnemonic.endswith(".wx") or
                  instr.mnemonic.endswith(".wf") or
-                 instr.mnemonic.endswith(".wi")) and instr.operands[1] == reg):
+                 instr.mnemonic.endswith(".wi")) and instr.operands[1] == name):
                 emul = 2 * instr.lmul
             else:
                 emul = instr.lmul
 
-            return self.vec_reg_seq(reg, True, emul, instr.max_emul())
+            return self.vec_reg_seq(name, True, emul, instr.max_emul())
 
         return [reg]
 
-    def output_seq(self, instr: Instruction, reg: str) -> Sequence[str]:
-        if instruction.is_vector_register(reg):
+    def output_seq(self, instr: Instruction, reg: int) -> Sequence[int]:
+        name = instruction.reg_name(reg)
+        if instruction.is_vector_register(name):
             assert instr.lmul is not None
 
             # TODO(sflur): anymore cases of output widening?
             if ((instr.mnemonic.startswith("vw") or
                  instr.mnemonic.startswith("vfw")) and
-                    instr.operands[0] == reg):
+                    instr.operands[0] == name):
                 emul = 2 * instr.lmul
             else:
                 emul = instr.lmul
 
-            return self.vec_reg_seq(reg, False, emul, instr.max_emul())
+            return self.vec_reg_seq(name, False, emul, instr.max_emul())
 
         res = [None] * self.eslices(instr)
         res[-1] = reg
         return res
 
     def input_seq_by_type(
-            self, instr: Instruction) -> Dict[str, Sequence[Sequence[str]]]:
+            self, instr: Instruction) -> Dict[str, Sequence[Sequence[int]]]:
         """Compute a map from register-files to sequences of input register
         sets.
 
         A register file is mapped to a sequence of sets, where set i is the set
-        of registers that will be read from by slice i.
+        of registers that will be read from by slice i. The result is cached
+        in `instr`.
         """
+        res = instr.input_seq_by_type_cache
+        if res is not None:
+            return res
+
         res = {}
 
         for ty, regs in instr.inputs_by_type().items():
-            seq = [collections.deque() for _ in range(self.eslices(instr))]
+            seq = [[] for _ in range(self.eslices(instr))]
 
             for reg in regs:
                 for i, r in enumerate(self.input_seq(instr, reg)):
@@ -448,20 +570,26 @@ class VectorPipe(interfaces.ExecPipeline):
 
             res[ty] = seq
 
+        instr.input_seq_by_type_cache = res
         return res
 
     def output_seq_by_type(
-            self, instr: Instruction) -> Dict[str, Sequence[Sequence[str]]]:
+            self, instr: Instruction) -> Dict[str, Sequence[Sequence[int]]]:
         """Compute a map from register-files to sequences of output register
         sets.
 
         A register file is mapped to a sequence of sets, where set i is the set
-        of registers that will be written to by slice i.
+        of registers that will be written to by slice i. The result is cached
+        in `instr`.
         """
+        res = instr.output_seq_by_type_cache
+        if res is not None:
+            return res
+
         res = {}
 
         for ty, regs in instr.outputs_by_type().items():
-            seq = [collections.deque() for _ in range(self.eslices(instr))]
+            seq = [[] for _ in range(self.eslices(instr))]
 
             for reg in regs:
                 for i, r in enumerate(self.output_seq(instr, reg)):
@@ -470,15 +598,16 @@ class VectorPipe(interfaces.ExecPipeline):
 
             res[ty] = seq
 
+        instr.output_seq_by_type_cache = res
         return res
 
     # Implements interfaces.ExecPipeline
     def print_state_detailed(self, file) -> None:
-        eiq_str = ", ".join(str(i) for i in reversed(list(self._eiq.chain())))
+        eiq_str = ", ".join(str(i) for i in self._eiq.reversed_chain())
         stages = ", ".join(f"{i[0]} ({i[1]})" if i else "-"
                            for i in self._stage)
         wbq_str = ", ".join(f"{i[0]} ({i[1]})"
-                            for i in reversed(list(self._writebackq.chain())))
+                            for i in self._writebackq.reversed_chain())
 
         pipe_str = (f"{eiq_str if eiq_str else '-'}"
                     f" > {stages}"
@@ -492,10 +621,10 @@ class VectorPipe(interfaces.ExecPipeline):
 
     # Implements interfaces.ExecPipeline
     def get_state_three_valued(self, vals: Sequence[str]) -> Sequence[str]:
-        if all(self._stage):
+        if self._occupied_stages == len(self._stage):
             # Full
             pipe_str = vals[2]
-        elif any(self._stage):
+        elif self._occupied_stages:
             # Partial
             pipe_str = vals[1]
         else: